@@ -9,7 +9,8 @@ Requirements:
     pip install pyannote.audio faster-whisper torch torchaudio
 
 Usage:
-    python test_pyannote.py <audio_file> [--token YOUR_HF_TOKEN] [--num-speakers 2]
+    python test_pyannote.py <audio_file> [--token YOUR_HF_TOKEN] [--num-speakers 2] [--batch-size 16]
+    python test_pyannote.py --batch < jobs.tsv
 
 You need a HuggingFace token with access to:
     - pyannote/speaker-diarization-3.1
@@ -19,10 +20,16 @@ You need a HuggingFace token with access to:
 import sys
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+
 # Check for required packages
 try:
+    import torch
+    import torchaudio
     from pyannote.audio import Pipeline
     HAS_PYANNOTE = True
 except ImportError:
@@ -30,35 +37,48 @@ except ImportError:
     print("ERROR: pyannote.audio not installed. Run: pip install pyannote.audio")
 
 try:
-    from faster_whisper import WhisperModel
+    from faster_whisper import BatchedInferencePipeline
+    from whisper_cache import get_whisper
     HAS_WHISPER = True
 except ImportError:
     HAS_WHISPER = False
     print("ERROR: faster-whisper not installed. Run: pip install faster-whisper")
 
 
+# Token resolved by get_hf_token(), reused for the rest of the process
+_cached_hf_token = None
+
+
+def _try_read_token(path: Path):
+    """Return the stripped token stored at path, or None if it can't be read."""
+    try:
+        return path.read_bytes().strip().decode() or None
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
 def get_hf_token(token_arg: str = None) -> str:
     """Get HuggingFace token from argument, environment, or prompt."""
+    global _cached_hf_token
+
     # Try argument first
     if token_arg:
         return token_arg
 
-    # Try local .hf_token file (project-specific)
-    local_token_path = Path(__file__).parent / ".hf_token"
-    if local_token_path.exists():
-        token = local_token_path.read_text().strip()
-        if token:
-            return token
+    if _cached_hf_token:
+        return _cached_hf_token
 
-    # Try environment variable
-    token = os.environ.get("HF_TOKEN") or os.environ.get("HUGGINGFACE_TOKEN")
+    # Try local .hf_token file (project-specific), then environment variable
+    token = (
+        _try_read_token(Path(__file__).parent / ".hf_token")
+        or os.environ.get("HF_TOKEN")
+        or os.environ.get("HUGGINGFACE_TOKEN")
+        # Try HuggingFace CLI cache
+        or _try_read_token(Path.home() / ".cache" / "huggingface" / "token")
+    )
     if token:
+        _cached_hf_token = token
         return token
-
-    # Try HuggingFace CLI cache
-    hf_token_path = Path.home() / ".cache" / "huggingface" / "token"
-    if hf_token_path.exists():
-        return hf_token_path.read_text().strip()
     
     # Prompt user
     print("\n" + "="*60)
@@ -78,27 +98,38 @@ def get_hf_token(token_arg: str = None) -> str:
         print("No token provided. Exiting.")
         sys.exit(1)
     
+    _cached_hf_token = token
     return token
 
 
-def transcribe_with_whisper(audio_path: str, model_size: str = "medium"):
+def load_audio_16k(audio_path: str):
+    """Decode audio once as a mono 16 kHz (1, T) tensor shared by Whisper and pyannote."""
+    waveform, sample_rate = torchaudio.load(audio_path)
+    if waveform.shape[0] > 1:
+        waveform = waveform.mean(dim=0, keepdim=True)
+    if sample_rate != 16000:
+        waveform = torchaudio.functional.resample(waveform, sample_rate, 16000)
+    return waveform
+
+
+def transcribe_with_whisper(audio, model_size: str = "medium", batch_size: int = 16):
     """Transcribe audio using Whisper with word timestamps."""
     print(f"\n[1/4] Loading Whisper {model_size} model...")
-    model = WhisperModel(model_size, device="cpu", compute_type="int8")
+    model = get_whisper(model_size, device="cpu", compute_type="int8")
+    batched_model = BatchedInferencePipeline(model=model)
     
-    print(f"[2/4] Transcribing audio...")
-    segments, info = model.transcribe(
-        audio_path,
+    print(f"[2/4] Transcribing audio (batch size {batch_size})...")
+    segments, info = batched_model.transcribe(
+        audio,
+        batch_size=batch_size,
         word_timestamps=True,
         vad_filter=True,
         vad_parameters=dict(min_silence_duration_ms=100)
     )
     
-    # Collect all words with timestamps
+    # Collect all words with timestamps (segments themselves are not kept)
     all_words = []
-    segments_list = []
     for segment in segments:
-        segments_list.append(segment)
         if hasattr(segment, 'words') and segment.words:
             for word in segment.words:
                 all_words.append({
@@ -111,13 +142,12 @@ def transcribe_with_whisper(audio_path: str, model_size: str = "medium"):
     print(f"    Duration: {info.duration:.1f} seconds")
     print(f"    Words extracted: {len(all_words)}")
     
-    return all_words, segments_list, info
+    return all_words, info
 
 
-def diarize_with_pyannote(audio_path: str, hf_token: str, num_speakers: int = None):
-    """Run pyannote speaker diarization."""
-    print(f"\n[3/4] Loading pyannote diarization pipeline...")
-    
+@lru_cache(maxsize=1)
+def load_pyannote_pipeline(hf_token: str):
+    """Load the pyannote pipeline once per token and reuse it across files."""
     try:
         pipeline = Pipeline.from_pretrained(
             "pyannote/speaker-diarization-3.1",
@@ -130,13 +160,26 @@ def diarize_with_pyannote(audio_path: str, hf_token: str, num_speakers: int = No
         print("2. A valid access token")
         sys.exit(1)
     
+    # Segmentation and embedding models dominate diarization time; run them on GPU when available
+    if torch.cuda.is_available():
+        pipeline.to(torch.device("cuda"))
+        print(f"    Using CUDA for segmentation and embedding")
+    
+    return pipeline
+
+
+def diarize_with_pyannote(audio, hf_token: str, num_speakers: int = None):
+    """Run pyannote speaker diarization."""
+    print(f"\n[3/4] Loading pyannote diarization pipeline...")
+    pipeline = load_pyannote_pipeline(hf_token)
+    
     print(f"    Running diarization...")
     
     # Run diarization with optional speaker count
     if num_speakers:
-        diarization = pipeline(audio_path, num_speakers=num_speakers)
+        diarization = pipeline(audio, num_speakers=num_speakers)
     else:
-        diarization = pipeline(audio_path)
+        diarization = pipeline(audio)
     
     # Extract speaker segments
     # New API: diarization is a DiarizeOutput object with .segments attribute
@@ -180,14 +223,34 @@ def assign_speakers_to_words(words: list, speaker_segments: list) -> list:
     print(f"\n[4/4] Aligning speakers to words...")
     
     for word in words:
-        word_center = (word['start'] + word['end']) / 2
-        
-        # Find the speaker segment that contains this word's center
         word['speaker'] = 'UNKNOWN'
-        for seg in speaker_segments:
-            if seg['start'] <= word_center <= seg['end']:
-                word['speaker'] = seg['speaker']
-                break
+    
+    if words and speaker_segments:
+        # Sort segments by start so each word center can be located with a binary search
+        segs = sorted(speaker_segments, key=lambda seg: seg['start'])
+        starts = np.array([seg['start'] for seg in segs])
+        ends = np.array([seg['end'] for seg in segs])
+        word_starts = np.fromiter((w['start'] for w in words), dtype=np.float64, count=len(words))
+        word_ends = np.fromiter((w['end'] for w in words), dtype=np.float64, count=len(words))
+        centers = (word_starts + word_ends) * 0.5
+        
+        # Last segment starting at or before each word center
+        idx = np.searchsorted(starts, centers, side='right') - 1
+        clipped = np.maximum(idx, 0)
+        found = (idx >= 0) & (centers <= ends[clipped])
+        
+        # Overlapping turns: an earlier segment may also cover the center, and the
+        # earliest covering segment wins, so fall back to a scan for those words only
+        prev_max_end = np.concatenate(([-np.inf], np.maximum.accumulate(ends)[:-1]))
+        overlapped = (idx >= 0) & (centers <= prev_max_end[clipped])
+        
+        for i in np.flatnonzero(found & ~overlapped):
+            words[i]['speaker'] = segs[idx[i]]['speaker']
+        for i in np.flatnonzero(overlapped):
+            for seg in segs[:idx[i] + 1]:
+                if seg['start'] <= centers[i] <= seg['end']:
+                    words[i]['speaker'] = seg['speaker']
+                    break
     
     # Count assignments
     assigned = sum(1 for w in words if w['speaker'] != 'UNKNOWN')
@@ -201,64 +264,44 @@ def format_transcript(words: list) -> str:
     if not words:
         return "No words transcribed."
     
-    lines = []
-    current_speaker = None
-    current_text = []
+    # Run-length encode speaker labels to find the start of each speaker turn
+    labels = np.array([w['speaker'] for w in words], dtype=object)
+    texts = [w['word'] for w in words]
+    change = np.concatenate(([True], labels[1:] != labels[:-1]))
+    boundaries = np.append(np.flatnonzero(change), len(words))
     
-    for word in words:
-        speaker = word['speaker']
-        if speaker != current_speaker:
-            # Output previous speaker's text
-            if current_text:
-                lines.append(f"{current_speaker}: {' '.join(current_text)}\n")
-            current_speaker = speaker
-            current_text = [word['word']]
-        else:
-            current_text.append(word['word'])
-    
-    # Output final speaker's text
-    if current_text:
-        lines.append(f"{current_speaker}: {' '.join(current_text)}\n")
+    lines = [
+        f"{labels[start]}: {' '.join(texts[start:end])}\n"
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+    ]
     
     return '\n'.join(lines)
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Test pyannote speaker diarization with Whisper transcription'
-    )
-    parser.add_argument('audio_file', help='Path to audio file')
-    parser.add_argument('--token', help='HuggingFace access token')
-    parser.add_argument('--num-speakers', type=int, help='Number of speakers (optional)')
-    parser.add_argument('--model', default='medium', help='Whisper model size (default: medium)')
-    parser.add_argument('--output', help='Output file path (default: <audio_name>_diarized.txt)')
-    
-    args = parser.parse_args()
-    
-    # Validate input
-    if not Path(args.audio_file).exists():
-        print(f"ERROR: Audio file not found: {args.audio_file}")
-        sys.exit(1)
-    
-    if not HAS_PYANNOTE or not HAS_WHISPER:
-        sys.exit(1)
-    
-    # Get HuggingFace token
-    hf_token = get_hf_token(args.token)
-    
+def process_audio_file(audio_file: str, output_path: str, hf_token: str, args) -> None:
+    """Transcribe, diarize and write one audio file, reusing already-loaded models."""
     print("\n" + "="*60)
     print("Pyannote Diarization Test")
     print("="*60)
-    print(f"Audio: {args.audio_file}")
+    print(f"Audio: {audio_file}")
     print(f"Model: {args.model}")
     if args.num_speakers:
         print(f"Speakers: {args.num_speakers}")
     
-    # Step 1-2: Transcribe with Whisper
-    words, segments, info = transcribe_with_whisper(args.audio_file, args.model)
+    # Decode once; both models consume the same in-memory 16 kHz waveform
+    waveform = load_audio_16k(audio_file)
     
-    # Step 3: Diarize with pyannote
-    speaker_segments = diarize_with_pyannote(args.audio_file, hf_token, args.num_speakers)
+    # Steps 1-3: Transcribe with Whisper and diarize with pyannote concurrently
+    # (both models release the GIL in their native backends)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        whisper_future = executor.submit(
+            transcribe_with_whisper, waveform.squeeze(0).numpy(), args.model, args.batch_size
+        )
+        pyannote_future = executor.submit(
+            diarize_with_pyannote, {"waveform": waveform, "sample_rate": 16000}, hf_token, args.num_speakers
+        )
+        words, info = whisper_future.result()
+        speaker_segments = pyannote_future.result()
     
     # Step 4: Align speakers to words
     words_with_speakers = assign_speakers_to_words(words, speaker_segments)
@@ -267,14 +310,12 @@ def main():
     transcript = format_transcript(words_with_speakers)
     
     # Determine output path
-    if args.output:
-        output_path = args.output
-    else:
-        output_path = Path(args.audio_file).stem + "_diarized.txt"
+    if not output_path:
+        output_path = Path(audio_file).stem + "_diarized.txt"
     
     # Write output
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"Transcript: {Path(args.audio_file).name}\n")
+        f.write(f"Transcript: {Path(audio_file).name}\n")
         f.write(f"Language: {info.language}\n")
         f.write(f"Duration: {info.duration:.2f} seconds\n")
         f.write(f"Speakers: {len(set(seg['speaker'] for seg in speaker_segments))}\n")
@@ -295,5 +336,49 @@ def main():
     print("-" * 40)
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description='Test pyannote speaker diarization with Whisper transcription'
+    )
+    parser.add_argument('audio_file', nargs='?', help='Path to audio file')
+    parser.add_argument('--token', help='HuggingFace access token')
+    parser.add_argument('--num-speakers', type=int, help='Number of speakers (optional)')
+    parser.add_argument('--model', default='medium', help='Whisper model size (default: medium)')
+    parser.add_argument('--batch-size', type=int, default=16,
+                        help='Whisper batch size (default: 16, use 8 on 8GB GPUs)')
+    parser.add_argument('--output', help='Output file path (default: <audio_name>_diarized.txt)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Read "<audio_file>[<TAB><output_file>]" lines from stdin and '
+                             'process them all with the same loaded models')
+    
+    args = parser.parse_args()
+    
+    if args.batch:
+        jobs = []
+        for line in sys.stdin:
+            fields = line.rstrip('\n').split('\t')
+            if fields[0].strip():
+                jobs.append((fields[0].strip(), fields[1].strip() if len(fields) > 1 else None))
+    elif args.audio_file:
+        jobs = [(args.audio_file, args.output)]
+    else:
+        parser.error("audio_file is required unless --batch is given")
+    
+    # Validate input
+    for audio_file, _ in jobs:
+        if not Path(audio_file).exists():
+            print(f"ERROR: Audio file not found: {audio_file}")
+            sys.exit(1)
+    
+    if not HAS_PYANNOTE or not HAS_WHISPER:
+        sys.exit(1)
+    
+    # Get HuggingFace token
+    hf_token = get_hf_token(args.token)
+    
+    for audio_file, output_path in jobs:
+        process_audio_file(audio_file, output_path, hf_token, args)
+
+
 if __name__ == '__main__':
     main()
@@ -7,26 +7,49 @@ import torchaudio
 import torch
 import numpy as np
 from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
-from sklearn.cluster import AgglomerativeClustering
-from faster_whisper import WhisperModel
+from sklearn.cluster import SpectralClustering
+from faster_whisper import BatchedInferencePipeline
+from whisper_cache import get_whisper
 
-def test_wavlm_diarization(audio_path, num_speakers=2):
+def test_wavlm_diarization(audio_path, num_speakers=2, batch_size=16):
     print(f"Testing WavLM diarization on: {audio_path}")
 
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"Using device: {device}")
+
     # Load WavLM models
     print("Loading WavLM models...")
     feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
     wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv')
+    wavlm_model = wavlm_model.to(device).eval()
+    if device == "cuda":
+        wavlm_model = wavlm_model.half()
+        wavlm_model = torch.compile(wavlm_model, mode="reduce-overhead", fullgraph=False)
+    else:
+        # Dynamic int8 quantization (CPU only; feature extractor stays fp32). Attention and
+        # TDNN layers read .weight directly, so only the encoder feed-forward layers qualify.
+        ffn_layers = {name for name, module in wavlm_model.named_modules()
+                      if isinstance(module, torch.nn.Linear) and '.feed_forward.' in name}
+        wavlm_model = torch.ao.quantization.quantize_dynamic(wavlm_model, ffn_layers, dtype=torch.qint8)
     print("WavLM models loaded!")
 
     # Load Whisper for transcription
     print("Loading Whisper model...")
-    whisper_model = WhisperModel("medium", device="cpu", compute_type="int8")
+    if device == "cuda":
+        try:
+            whisper_model = get_whisper("medium", device="cuda", compute_type="float16")
+        except Exception as e:
+            # Fall back to int8 weights when the GPU is short on memory
+            print(f"float16 load failed ({e}), retrying with int8_float16...")
+            whisper_model = get_whisper("medium", device="cuda", compute_type="int8_float16")
+    else:
+        whisper_model = get_whisper("medium", device="cpu", compute_type="int8")
+    whisper_model = BatchedInferencePipeline(model=whisper_model)
     print("Whisper loaded!")
 
     # Transcribe with word timestamps
     print("Transcribing audio...")
-    segments, info = whisper_model.transcribe(audio_path, word_timestamps=True)
+    segments, info = whisper_model.transcribe(audio_path, batch_size=batch_size, word_timestamps=True)
     segments_list = list(segments)
     print(f"Got {len(segments_list)} segments")
 
@@ -44,46 +67,94 @@ def test_wavlm_diarization(audio_path, num_speakers=2):
     # Resample if needed
     if sample_rate != 16000:
         print(f"Resampling from {sample_rate}Hz to 16000Hz...")
-        resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-        waveform = resampler(waveform)
+        # Resample once on the device; the feature extractor works on host arrays, so copy back once
+        waveform = torchaudio.functional.resample(waveform.to(device), sample_rate, 16000, lowpass_filter_width=16).cpu()
         sample_rate = 16000
 
-    # Extract embeddings for each word
-    print(f"Extracting embeddings for {len(all_words)} words...")
-    embeddings_list = []
-
-    for i, word in enumerate(all_words):
-        if i % 10 == 0:
-            print(f"  Progress: {i}/{len(all_words)}")
+    # Extract one embedding per Whisper segment (x-vectors are stable over 1-2s spans,
+    # so this needs far fewer forward passes than one per word)
+    word_segments = [seg for seg in segments_list if hasattr(seg, 'words') and seg.words]
+    print(f"Extracting embeddings for {len(word_segments)} segments...")
+
+    segment_audios = [waveform[0, int(seg.start * sample_rate):int(seg.end * sample_rate)].numpy() for seg in word_segments]
+    valid = np.zeros(len(word_segments), dtype=bool)
+    valid_indices = [i for i, audio in enumerate(segment_audios) if len(audio) > 0]
+
+    # Embeddings are written into a preallocated device tensor; nothing is copied back per batch
+    embeddings_dtype = torch.float16 if device == "cuda" else torch.float32
+    embeddings_tensor = torch.empty((len(word_segments), 512), device=device, dtype=embeddings_dtype)
+
+    # Inputs are padded to a multiple of 0.1s so the compiled model sees few distinct shapes
+    BATCH_SIZE = 32
+    PAD_MULTIPLE = 1600
+
+    # Host-to-device copies go on their own stream so they overlap the previous forward pass
+    copy_stream = torch.cuda.Stream() if device == "cuda" else None
+
+    def embed_batch(audios):
+        inputs = feature_extractor(audios, sampling_rate=16000, return_tensors="pt",
+                                   padding=True, pad_to_multiple_of=PAD_MULTIPLE)
+        if device == "cuda":
+            # Halve the host-to-device copy by casting to fp16 on the host, and pin every input so
+            # the non_blocking copies below are truly asynchronous
+            inputs["input_values"] = inputs["input_values"].half()
+            inputs = {k: v.pin_memory() for k, v in inputs.items()}
+            with torch.cuda.stream(copy_stream):
+                inputs = {k: v.to(device, non_blocking=True) for k, v in inputs.items()}
+            torch.cuda.current_stream().wait_stream(copy_stream)
+            # The tensors were allocated on copy_stream but are read here; without this the caching
+            # allocator could hand their memory to the next batch's copy while this forward still runs
+            for v in inputs.values():
+                v.record_stream(torch.cuda.current_stream())
+            with torch.inference_mode(), torch.autocast("cuda", dtype=torch.float16):
+                embeddings = wavlm_model(**inputs).embeddings
+                return torch.nn.functional.normalize(embeddings, dim=-1)
+        with torch.inference_mode():
+            embeddings = wavlm_model(**inputs).embeddings
+            return torch.nn.functional.normalize(embeddings, dim=-1)
+
+    if device == "cuda":
+        # Warm up the compiled graph so the first real batch doesn't pay compilation cost
+        embed_batch([np.zeros(16000, dtype=np.float32)] * BATCH_SIZE)
+
+    for batch_start in range(0, len(valid_indices), BATCH_SIZE):
+        print(f"  Progress: {batch_start}/{len(valid_indices)}")
+        batch_indices = valid_indices[batch_start:batch_start + BATCH_SIZE]
 
         try:
-            start_sample = int(word.start * sample_rate)
-            end_sample = int(word.end * sample_rate)
-            word_audio = waveform[:, start_sample:end_sample]
-
-            # Extract embedding
-            inputs = feature_extractor(word_audio.squeeze().numpy(), sampling_rate=16000, return_tensors="pt", padding=True)
-            with torch.no_grad():
-                embedding = wavlm_model(**inputs).embeddings
-                embedding = torch.nn.functional.normalize(embedding, dim=-1)
-            embeddings_list.append(embedding[0].cpu().numpy())
+            embeddings_tensor[batch_indices] = embed_batch([segment_audios[i] for i in batch_indices]).to(embeddings_dtype)
+            valid[batch_indices] = True
         except Exception as e:
-            print(f"Failed to extract embedding for word at {word.start:.2f}s: {e}")
-            embeddings_list.append(np.zeros(512))
-
-    # Cluster embeddings
-    embeddings_array = np.array(embeddings_list)
-    print(f"Clustering {len(embeddings_array)} embeddings into {num_speakers} speakers...")
-
-    clustering = AgglomerativeClustering(n_clusters=num_speakers, metric='cosine', linkage='average')
-    speaker_ids = clustering.fit_predict(embeddings_array)
-
-    unique_speakers = len(set(speaker_ids))
+            print(f"Failed to extract embeddings for batch at {word_segments[batch_indices[0]].start:.2f}s: {e}")
+
+    # Cluster embeddings (failed segments are left out rather than clustered as zero vectors)
+    num_valid = int(valid.sum())
+    print(f"Clustering {num_valid} embeddings into {num_speakers} speakers...")
+
+    seg_labels = np.zeros(len(word_segments), dtype=int)
+    if num_valid >= max(num_speakers, 2):
+        # Embeddings are L2-normalized, so one GEMM gives cosine similarity; shift it into [0, 1].
+        # Only the (small) similarity matrix is copied back to the host.
+        valid_embeddings = embeddings_tensor[torch.from_numpy(valid).to(device)].float()
+        affinity = ((valid_embeddings @ valid_embeddings.T + 1) / 2).cpu().numpy()
+        clustering = SpectralClustering(n_clusters=num_speakers, affinity='precomputed', assign_labels='kmeans')
+        seg_labels[valid] = clustering.fit_predict(affinity)
+
+        # Segments without an embedding take the label of the closest preceding segment that has one
+        source = np.where(valid, np.arange(len(word_segments)), -1)
+        source = np.maximum.accumulate(source)
+        source[source < 0] = np.flatnonzero(valid)[0]
+        seg_labels = seg_labels[source]
+    else:
+        print("Not enough valid embeddings for clustering, assigning all to SPEAKER_00")
+
+    unique_speakers = len(set(seg_labels))
     print(f"Found {unique_speakers} distinct speakers")
 
-    # Assign speakers to words
-    for i, word in enumerate(all_words):
-        word.speaker = f"SPEAKER_{speaker_ids[i]:02d}"
+    # Propagate each segment's speaker to its words
+    for seg_idx, seg in enumerate(word_segments):
+        for word in seg.words:
+            word.speaker = f"SPEAKER_{seg_labels[seg_idx]:02d}"
 
     # Print results
     print("\n=== Diarization Results ===")
@@ -107,10 +178,11 @@ def test_wavlm_diarization(audio_path, num_speakers=2):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python test_wavlm.py <audio_file> [num_speakers]")
+        print("Usage: python test_wavlm.py <audio_file> [num_speakers] [batch_size]")
         sys.exit(1)
 
     audio_path = sys.argv[1]
     num_speakers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 16
 
-    test_wavlm_diarization(audio_path, num_speakers)
+    test_wavlm_diarization(audio_path, num_speakers, batch_size)
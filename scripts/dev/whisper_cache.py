@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Shared faster-whisper model cache for the dev test scripts
+"""
+from functools import lru_cache
+
+from faster_whisper import WhisperModel
+
+
+@lru_cache(maxsize=4)
+def get_whisper(model_size, device="cpu", compute_type="int8"):
+    """Load a WhisperModel once per (size, device, compute type) and reuse it."""
+    return WhisperModel(model_size, device=device, compute_type=compute_type)
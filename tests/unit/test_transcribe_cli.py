@@ -89,7 +89,7 @@ class TestTranscribeSimple:
 class TestTranscribeWithWavLM:
     """Test suite for WavLM speaker diarization."""
 
-    @patch('transcribe_cli.torchaudio')
+    @patch('transcribe_cli.decode_audio')
     @patch('transcribe_cli.WavLMForXVector')
     @patch('transcribe_cli.Wav2Vec2FeatureExtractor')
     @patch('transcribe_cli.AgglomerativeClustering')
@@ -97,7 +97,7 @@ class TestTranscribeWithWavLM:
     @patch('transcribe_cli.torch')
     def test_diarization_two_speakers(self, mock_torch, mock_np, mock_clustering,
                                      mock_extractor_class, mock_model_class,
-                                     mock_torchaudio, mock_whisper_model, temp_output_dir):
+                                     mock_decode_audio, mock_whisper_model, temp_output_dir):
         """
         TC-CLI-007: Diarization with 2 speakers
 
@@ -109,14 +109,14 @@ class TestTranscribeWithWavLM:
 
         # Mock Whisper segments with words
         word1 = Mock()
-        word1.word = "Hello"
+        word1.word = " Hello"
         word1.start = 0.0
         word1.end = 0.5
 
         word2 = Mock()
-        word2.word = "world"
-        word2.start = 1.0
-        word2.end = 1.5
+        word2.word = " world"
+        word2.start = 3.0
+        word2.end = 3.5
 
         segment = Mock()
         segment.words = [word1, word2]
@@ -128,11 +128,13 @@ class TestTranscribeWithWavLM:
 
         mock_whisper_model.transcribe.return_value = ([segment], info)
 
-        # Mock torchaudio
+        # Mock the decoded audio and the waveform built from it
         import numpy as np
+        mock_decode_audio.return_value = np.zeros(32000, dtype=np.float32)
         mock_waveform = Mock()
         mock_waveform.__getitem__ = Mock(return_value=Mock())
-        mock_torchaudio.load.return_value = (mock_waveform, 16000)
+        mock_waveform.shape = (1, 32000)
+        mock_torch.from_numpy.return_value.unsqueeze.return_value = mock_waveform
 
         # Mock WavLM models
         mock_extractor = Mock()
@@ -169,7 +171,82 @@ class TestTranscribeWithWavLM:
         content = output_path.read_text()
         assert "SPEAKER_" in content or "Hello world" in content
 
-    def test_diarization_handles_no_words(self, mock_whisper_model, temp_output_dir):
+    @patch('transcribe_cli.decode_audio')
+    @patch('transcribe_cli.WavLMForXVector')
+    @patch('transcribe_cli.Wav2Vec2FeatureExtractor')
+    def test_diarization_embeds_windows_in_batches(self, mock_extractor_class, mock_model_class,
+                                                   mock_decode_audio, mock_whisper_model, temp_output_dir):
+        """
+        Verify that sliding windows are embedded in batched forward passes.
+        """
+        import numpy as np
+        import torch
+
+        # Arrange
+        output_path = temp_output_dir / "batched_output.txt"
+        words = []
+        for i in range(4):
+            word = Mock()
+            word.word = f"w{i}"
+            word.start = i * 1.0
+            word.end = i * 1.0 + 0.4
+            words.append(word)
+
+        segment = Mock()
+        segment.words = words
+        segment.text = "w0 w1 w2 w3"
+
+        info = Mock()
+        info.language = "en"
+        info.duration = 4.0
+
+        mock_whisper_model.transcribe.return_value = ([segment], info)
+        mock_decode_audio.return_value = np.ones(16000 * 4, dtype=np.float32)
+
+        mock_extractor_class.from_pretrained.return_value = Mock(
+            side_effect=lambda audios, **kwargs: {'input_values': torch.zeros(len(audios), 16000)}
+        )
+        mock_model = Mock(side_effect=lambda input_values: Mock(
+            embeddings=torch.eye(2)[torch.arange(len(input_values)) % 2]
+        ))
+        mock_model_class.from_pretrained.return_value.to.return_value.eval.return_value = mock_model
+
+        # Act
+        with patch('transcribe_cli.EMBEDDING_BATCH_SIZE', 4):
+            transcribe_cli.transcribe_with_wavlm(mock_whisper_model, "/fake/audio.mp3", 2, str(output_path))
+
+        # Assert - audio decoded once, 7 windows contain words, embedded 4 at a time
+        mock_decode_audio.assert_called_once_with("/fake/audio.mp3", sampling_rate=16000)
+        assert mock_model.call_count == 2
+        assert "SPEAKER_" in output_path.read_text()
+
+    @pytest.mark.parametrize("num_speakers, word_end", [(1, 10.0), (2, 2.0)])
+    @patch('transcribe_cli.decode_audio')
+    @patch('transcribe_cli.WavLMForXVector')
+    def test_diarization_skipped_for_single_speaker_or_short_audio(self, mock_model_class, mock_decode_audio,
+                                                                   num_speakers, word_end,
+                                                                   mock_whisper_model, temp_output_dir):
+        """
+        Verify that one requested speaker, or too little speech, skips WavLM and labels SPEAKER_00.
+        """
+        # Arrange
+        output_path = temp_output_dir / "single_speaker.txt"
+        word1 = Mock(word=" Hi", start=0.0, end=0.5)
+        word2 = Mock(word=" there", start=word_end - 0.5, end=word_end)
+        segment = Mock(words=[word1, word2], text=" Hi there")
+        info = Mock(language="en", duration=word_end)
+        mock_whisper_model.transcribe.return_value = ([segment], info)
+
+        # Act
+        transcribe_cli.transcribe_with_wavlm(mock_whisper_model, "/fake/audio.mp3", num_speakers, str(output_path))
+
+        # Assert
+        mock_model_class.from_pretrained.assert_not_called()
+        assert mock_whisper_model.transcribe.call_args[0][0] is mock_decode_audio.return_value
+        assert "SPEAKER_00: Hi there" in output_path.read_text()
+
+    @patch('transcribe_cli.decode_audio')
+    def test_diarization_handles_no_words(self, mock_decode_audio, mock_whisper_model, temp_output_dir):
         """
         TC-CLI-008: Diarization with no words
 
@@ -197,11 +274,11 @@ class TestTranscribeWithWavLM:
         assert result == str(output_path)
         assert output_path.exists()
 
-    @patch('transcribe_cli.torchaudio')
+    @patch('transcribe_cli.decode_audio')
     @patch('transcribe_cli.WavLMForXVector')
     @patch('transcribe_cli.Wav2Vec2FeatureExtractor')
     def test_diarization_calls_whisper_with_word_timestamps(self, mock_extractor_class,
-                                                            mock_model_class, mock_torchaudio,
+                                                            mock_model_class, mock_decode_audio,
                                                             mock_whisper_model, temp_output_dir):
         """
         TC-CLI-009: Verify Whisper is called with word_timestamps=True
@@ -254,7 +331,26 @@ class TestTranscribeWithWavLM:
         overlap = (window_size - stride) / window_size
         assert overlap == 0.5, "Should have 50% overlap"
 
-    def test_output_file_contains_metadata(self, mock_whisper_model, temp_output_dir):
+    def test_cosine_distances_match_pairwise_cosine(self):
+        """
+        Verify that the GEMM-based distances match 1 - cosine similarity for unit vectors.
+        """
+        import numpy as np
+
+        # Arrange
+        embeddings = np.array([[3.0, 4.0], [4.0, 3.0], [-3.0, -4.0]])
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        # Act
+        distances = transcribe_cli.cosine_distances(embeddings)
+
+        # Assert
+        expected = np.array([[0.0, 0.04, 2.0], [0.04, 0.0, 1.96], [2.0, 1.96, 0.0]])
+        np.testing.assert_allclose(distances, expected, atol=1e-12)
+        assert (distances >= 0.0).all()
+
+    @patch('transcribe_cli.decode_audio')
+    def test_output_file_contains_metadata(self, mock_decode_audio, mock_whisper_model, temp_output_dir):
         """
         TC-CLI-011: Verify output file contains metadata
 
@@ -448,9 +544,11 @@ class TestTranscribeSimpleFunction:
 class TestCliMain:
     """Test suite for main() CLI function."""
 
+    @patch('transcribe_cli.BatchedInferencePipeline')
     @patch('transcribe_cli.WhisperModel')
     @patch('transcribe_cli.transcribe_simple')
-    def test_main_simple_transcription(self, mock_transcribe_simple, mock_whisper_class, temp_output_dir):
+    def test_main_simple_transcription(self, mock_transcribe_simple, mock_whisper_class, mock_batched_class,
+                                       temp_output_dir):
         """
         TC-CLI-016: CLI main() with simple transcription
 
@@ -479,11 +577,13 @@ class TestCliMain:
 
         # Assert
         mock_whisper_class.assert_called_once_with("tiny", device="auto", compute_type="auto")
+        mock_batched_class.assert_called_once_with(model=mock_model)
         mock_transcribe_simple.assert_called_once()
         call_args = mock_transcribe_simple.call_args[0]
-        assert call_args[0] == mock_model
+        assert call_args[0] == mock_batched_class.return_value
         assert call_args[1] == str(audio_file)
 
+    @patch('transcribe_cli.BatchedInferencePipeline', None)
     @patch('transcribe_cli.WhisperModel')
     @patch('transcribe_cli.transcribe_with_wavlm')
     def test_main_with_diarization(self, mock_diarize, mock_whisper_class, temp_output_dir):
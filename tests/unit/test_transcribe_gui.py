@@ -53,6 +53,8 @@ class TestConfigurationManagement:
                 app.cpu_threads = Mock()
                 app.cpu_threads.set = Mock()
                 app.cpu_threads.get = Mock(return_value=4)
+                app.compute_type = Mock()
+                app.compute_type.set = Mock()
                 app.output_format = Mock()
                 app.output_format.set = Mock()
                 app.enable_diarization = Mock()
@@ -122,6 +124,8 @@ class TestConfigurationManagement:
                 app.remember_folder.get = Mock(return_value=True)
                 app.cpu_threads = Mock()
                 app.cpu_threads.get = Mock(return_value=8)
+                app.compute_type = Mock()
+                app.compute_type.get = Mock(return_value="int8")
                 app.output_format = Mock()
                 app.output_format.get = Mock(return_value="with_timestamps")
                 app.enable_diarization = Mock()
@@ -134,7 +138,7 @@ class TestConfigurationManagement:
         # Mock CONFIG_FILE to point to our test path
         with patch('transcribe_gui.CONFIG_FILE', config_path):
             # Act
-            app.save_config()
+            app._save_config_now()
 
             # Assert
             assert config_path.exists()
@@ -144,8 +148,104 @@ class TestConfigurationManagement:
             assert content['output_folder'] == "/tmp/output"
             assert content['remember_folder'] is True
             assert content['cpu_threads'] == 8
+            assert content['compute_type'] == "int8"
             assert content['num_speakers'] == 2
 
+            # No temp file left behind
+            assert not config_path.with_suffix('.tmp').exists()
+
+    def test_save_config_skips_unchanged_settings(self, temp_output_dir):
+        """
+        Verify that saving identical settings a second time does not rewrite the file.
+        """
+        # Arrange
+        config_path = temp_output_dir / "test_config.json"
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.output_folder = None
+        for name, value in [("remember_folder", False), ("cpu_threads", 4), ("compute_type", "auto"),
+                            ("output_format", "plain"), ("enable_diarization", False), ("hf_token", ""),
+                            ("num_speakers", 0)]:
+            setattr(app, name, Mock(get=Mock(return_value=value)))
+
+        with patch('transcribe_gui.CONFIG_FILE', config_path):
+            app._save_config_now()
+            config_path.write_bytes(b"sentinel")
+
+            # Act
+            app._save_config_now()
+
+        # Assert - second save was a no-op
+        assert config_path.read_bytes() == b"sentinel"
+
+    def test_save_config_is_debounced(self):
+        """
+        Verify that repeated save_config() calls reschedule a single pending write.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.root = Mock()
+        app.root.after.side_effect = ["after#1", "after#2"]
+        app._save_after_id = None
+
+        # Act
+        app.save_config()
+        app.save_config()
+
+        # Assert
+        assert app.root.after.call_count == 2
+        app.root.after.assert_called_with(transcribe_gui.CONFIG_SAVE_DELAY_MS, app._save_config_now)
+        app.root.after_cancel.assert_called_once_with("after#1")
+        assert app._save_after_id == "after#2"
+
+    def test_flush_config_writes_pending_save(self):
+        """
+        Verify that flush_config() cancels the timer and writes immediately.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.root = Mock()
+        app._save_after_id = "after#1"
+        app._save_config_now = Mock()
+
+        # Act
+        app.flush_config()
+
+        # Assert
+        app.root.after_cancel.assert_called_once_with("after#1")
+        app._save_config_now.assert_called_once()
+
+    def test_app_config_ignores_unknown_keys(self):
+        """
+        Verify that AppConfig.from_dict() drops unknown keys and defaults missing ones.
+        """
+        # Arrange
+        data = {"cpu_threads": 6, "output_format": "plain_text", "removed_setting": True}
+
+        # Act
+        config = transcribe_gui.AppConfig.from_dict(data)
+
+        # Assert
+        assert config.cpu_threads == 6
+        assert config.output_format == "plain_text"
+        assert config.num_speakers == 0
+        assert not hasattr(config, "removed_setting")
+
+    @pytest.mark.parametrize("cuda_devices, expected", [(1, "int8_float16"), (0, "int8")])
+    def test_pick_compute_type_by_device(self, cuda_devices, expected):
+        """
+        Verify that the auto compute type is int8_float16 on CUDA and int8 otherwise.
+        """
+        # Arrange
+        fake_ct2 = Mock()
+        fake_ct2.get_cuda_device_count.return_value = cuda_devices
+
+        # Act
+        with patch.dict(sys.modules, {'ctranslate2': fake_ct2}):
+            compute_type = transcribe_gui._pick_compute_type()
+
+        # Assert
+        assert compute_type == expected
+
 
 class TestFileQueueOperations:
     """Test suite for file queue management."""
@@ -226,6 +326,116 @@ class TestFileQueueOperations:
         app.update_file_list.assert_called_once()
         app.update_start_button.assert_called_once()
 
+    def test_add_folder_queues_media_recursively(self, temp_output_dir):
+        """
+        Verify that a dropped folder is walked recursively and only media files are queued.
+        """
+        # Arrange
+        nested = temp_output_dir / "season1"
+        nested.mkdir()
+        (temp_output_dir / "a.mp3").touch()
+        (temp_output_dir / "notes.txt").touch()
+        (nested / "b.WAV").touch()
+
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.file_queue = []
+        app.update_file_list = Mock()
+        app.update_start_button = Mock()
+
+        # Act
+        app.add_files_to_queue([str(temp_output_dir)])
+
+        # Assert
+        assert app.file_queue == [temp_output_dir / "a.mp3", nested / "b.WAV"]
+
+    def test_large_drop_checks_files_with_one_listing(self, temp_output_dir):
+        """
+        Verify that a large drop from one folder is validated via os.scandir, in drop order.
+        """
+        # Arrange
+        for name in ("b.mp3", "a.mp3", "c.mp4"):
+            (temp_output_dir / name).touch()
+        (temp_output_dir / "dir.mp3").mkdir()
+        dropped = [str(temp_output_dir / name) for name in ("b.mp3", "missing.mp3", "dir.mp3", "a.mp3", "c.mp4")]
+
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.file_queue = []
+        app.update_file_list = Mock()
+        app.update_start_button = Mock()
+
+        # Act
+        with patch('transcribe_gui.SCANDIR_MIN_FILES', 2), \
+                patch('transcribe_gui.os.path.isfile', side_effect=AssertionError("stat per file")):
+            app.add_files_to_queue(dropped)
+
+        # Assert
+        assert app.file_queue == [temp_output_dir / name for name in ("b.mp3", "a.mp3", "c.mp4")]
+
+    def _make_tree_app(self, files):
+        class FakeTree:
+            def __init__(self):
+                self.rows = {}
+                self.inserted = 0
+                self.renamed = 0
+
+            def insert(self, parent, index, iid=None, text="", values=()):
+                self.inserted += 1
+                iid = iid or f"I{self.inserted}"
+                self.rows[iid] = text
+                return iid
+
+            def delete(self, *iids):
+                for iid in iids:
+                    del self.rows[iid]
+
+            def exists(self, iid):
+                return iid in self.rows
+
+            def item(self, iid, text):
+                self.renamed += 1
+                self.rows[iid] = text
+
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.file_tree = FakeTree()
+        app.file_row_ids = {}
+        app.file_queue = transcribe_gui.deque(files)
+        app.selected_file_index = None
+        app.update_remove_button = Mock()
+        app.update_file_list()
+        return app
+
+    def test_update_file_list_only_touches_changed_rows(self):
+        """
+        Verify that queue updates insert/delete only the rows that changed.
+        """
+        # Arrange
+        app = self._make_tree_app([Path(f"/test/{name}.mp3") for name in "abc"])
+
+        # Act
+        del app.file_queue[0]
+        app.update_file_list()
+
+        # Assert - no rows re-inserted, remaining rows renumbered
+        assert app.file_tree.inserted == 3
+        assert list(app.file_tree.rows.values()) == ["1. b.mp3", "2. c.mp3"]
+
+    def test_update_file_list_renumbers_only_shifted_rows_and_appends_tail(self):
+        """
+        Verify that rows before a removal keep their labels and new files only add tail rows.
+        """
+        # Arrange
+        app = self._make_tree_app([Path(f"/test/{name}.mp3") for name in "abcd"])
+
+        # Act
+        del app.file_queue[2]
+        app.file_queue.append(Path("/test/e.mp3"))
+        app.update_file_list()
+
+        # Assert - only d was renumbered, only e was inserted
+        assert app.file_tree.renamed == 1
+        assert app.file_tree.inserted == 5
+        assert list(app.file_tree.rows.values()) == ["1. a.mp3", "2. b.mp3", "3. d.mp3", "4. e.mp3"]
+
     @patch('transcribe_gui.Tk')
     def test_remove_file_while_processing(self, mock_tk, temp_output_dir):
         """
@@ -487,7 +697,7 @@ class TestOutputFolderValidation:
 class TestFormatTimestamp:
     """Test suite for timestamp formatting."""
 
-    def test_format_timestamp_minutes_seconds(self):
+    def test_segment_timestamp_minutes_seconds(self):
         """
         TC-GUI-001: Format seconds to HH:MM:SS
 
@@ -498,12 +708,12 @@ class TestFormatTimestamp:
             app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
 
             # Act
-            result = app.format_timestamp(125)
+            result = app.format_segment(Mock(start=125, end=125, text="t"), "", "with_timestamps")
 
             # Assert
-            assert result == "00:02:05"
+            assert result == "[00:02:05 --> 00:02:05]\nt\n\n"
 
-    def test_format_timestamp_zero(self):
+    def test_segment_timestamp_zero(self):
         """
         TC-GUI-002: Format zero seconds
 
@@ -514,12 +724,12 @@ class TestFormatTimestamp:
             app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
 
             # Act
-            result = app.format_timestamp(0)
+            result = app.format_segment(Mock(start=0, end=0, text="t"), "", "with_timestamps")
 
             # Assert
-            assert result == "00:00:00"
+            assert result == "[00:00:00 --> 00:00:00]\nt\n\n"
 
-    def test_format_timestamp_hours(self):
+    def test_segment_timestamp_hours(self):
         """
         TC-GUI-003: Format hours
 
@@ -530,12 +740,12 @@ class TestFormatTimestamp:
             app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
 
             # Act
-            result = app.format_timestamp(3665)
+            result = app.format_segment(Mock(start=3665, end=3665, text="t"), "", "with_timestamps")
 
             # Assert
-            assert result == "01:01:05"
+            assert result == "[01:01:05 --> 01:01:05]\nt\n\n"
 
-    def test_format_timestamp_with_float(self):
+    def test_segment_timestamp_with_float(self):
         """
         TC-GUI-004: Handle fractional seconds
 
@@ -546,12 +756,12 @@ class TestFormatTimestamp:
             app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
 
             # Act
-            result = app.format_timestamp(125.7)
+            result = app.format_segment(Mock(start=125.7, end=125.7, text="t"), "", "with_timestamps")
 
             # Assert
-            assert result == "00:02:05"
+            assert result == "[00:02:05 --> 00:02:05]\nt\n\n"
 
-    def test_format_timestamp_exactly_one_hour(self):
+    def test_segment_timestamp_exactly_one_hour(self):
         """
         TC-GUI-005: Format exactly one hour
 
@@ -562,12 +772,12 @@ class TestFormatTimestamp:
             app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
 
             # Act
-            result = app.format_timestamp(3600)
+            result = app.format_segment(Mock(start=3600, end=3600, text="t"), "", "with_timestamps")
 
             # Assert
-            assert result == "01:00:00"
+            assert result == "[01:00:00 --> 01:00:00]\nt\n\n"
 
-    def test_format_timestamp_large_value(self):
+    def test_segment_timestamp_large_value(self):
         """
         TC-GUI-006: Format large timestamp
 
@@ -578,10 +788,764 @@ class TestFormatTimestamp:
             app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
 
             # Act
-            result = app.format_timestamp(36000)  # 10 hours
+            result = app.format_segment(Mock(start=36000, end=36000, text="t"), "", "with_timestamps")  # 10 hours
 
             # Assert
-            assert result == "10:00:00"
+            assert result == "[10:00:00 --> 10:00:00]\nt\n\n"
+
+
+class TestExtractEmbeddingsBatched:
+    """Test suite for batched WavLM embedding extraction."""
+
+    def _make_app(self, embeddings_per_call):
+        import torch
+
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._ensure_models_imported()
+        app.wavlm_device = "cpu"
+        app.wavlm_feature_extractor = Mock(
+            side_effect=lambda audios, **kwargs: {'input_values': torch.zeros(len(audios), 16000)}
+        )
+        outputs = [Mock(embeddings=torch.tensor(e, dtype=torch.float32)) for e in embeddings_per_call]
+        app.wavlm_model = Mock(side_effect=outputs)
+        return app
+
+    def test_windows_are_batched(self):
+        """
+        Verify that windows are embedded in batches of WAVLM_BATCH_SIZE.
+        """
+        import torch
+
+        # Arrange
+        segments = [{'start': i * 0.5, 'end': i * 0.5 + 1.0} for i in range(5)]
+        app = self._make_app([[[3.0, 4.0]] * 2, [[3.0, 4.0]] * 2, [[3.0, 4.0]]])
+
+        # Act
+        with patch('transcribe_gui.WAVLM_BATCH_SIZE', 2):
+            embeddings, valid_segments = app.extract_embeddings_batched(torch.ones(1, 16000 * 4), segments)
+
+        # Assert
+        assert app.wavlm_model.call_count == 3
+        assert embeddings.shape == (5, 2)
+        assert valid_segments == segments
+        assert embeddings[0].tolist() == pytest.approx([0.6, 0.8])
+
+    def test_nan_embeddings_are_dropped(self):
+        """
+        Verify that windows with NaN embeddings are excluded from the result.
+        """
+        import torch
+
+        # Arrange
+        segments = [{'start': 0.0, 'end': 1.0}, {'start': 0.5, 'end': 1.5}]
+        app = self._make_app([[[1.0, 0.0], [float('nan'), 0.0]]])
+
+        # Act
+        embeddings, valid_segments = app.extract_embeddings_batched(torch.ones(2, 16000 * 2), segments)
+
+        # Assert
+        assert embeddings.shape == (1, 2)
+        assert valid_segments == [segments[0]]
+
+    def test_silent_windows_are_skipped(self):
+        """
+        Verify that windows below SILENCE_RMS never reach the WavLM model.
+        """
+        import torch
+
+        # Arrange
+        segments = [{'start': 0.0, 'end': 1.0}, {'start': 1.0, 'end': 2.0}]
+        waveform = torch.cat([torch.zeros(1, 16000), torch.full((1, 16000), 0.5)], dim=1)
+        app = self._make_app([[[1.0, 0.0]]])
+
+        # Act
+        embeddings, valid_segments = app.extract_embeddings_batched(waveform, segments)
+
+        # Assert
+        assert app.wavlm_model.call_count == 1
+        assert len(app.wavlm_feature_extractor.call_args.args[0]) == 1
+        assert valid_segments == [segments[1]]
+
+    def test_resampler_is_reused_per_sample_rate(self):
+        """
+        Verify that resample_to_16k() builds one Resample module per source rate.
+        """
+        import torch
+
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._ensure_models_imported()
+        app._resamplers = {}
+
+        # Act
+        first = app.resample_to_16k(torch.zeros(1, 44100), 44100)
+        second = app.resample_to_16k(torch.zeros(1, 44100), 44100)
+
+        # Assert
+        assert first.shape == second.shape == (1, 16000)
+        assert list(app._resamplers) == [44100]
+
+    def test_vote_word_speakers_majority_tie_and_fallback(self):
+        """
+        Verify majority voting, earliest-window tie-breaking, and nearest-window fallback.
+        """
+        import numpy as np
+
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._ensure_models_imported()
+        windows = [
+            {'word_indices': [0, 1], 'start': 0.0, 'end': 1.0},
+            {'word_indices': [0, 1], 'start': 0.5, 'end': 1.5},
+            {'word_indices': [0], 'start': 1.0, 'end': 2.0},
+            {'word_indices': [3], 'start': 5.0, 'end': 6.0},
+        ]
+        window_speaker_ids = [1, 0, 1, 2]
+        word_centers = np.array([0.7, 0.9, 4.0, 5.5])
+
+        # Act
+        labels = app.vote_word_speakers(word_centers, windows, window_speaker_ids)
+
+        # Assert - word 0 majority, word 1 tie -> earliest window, word 2 in no window -> nearest
+        assert labels.tolist() == [1, 1, 2, 2]
+
+    def test_speakers_at_maps_times_to_covering_turns(self):
+        """
+        Verify turn lookup for covered, uncovered, boundary and nested-overlap times.
+        """
+        from types import SimpleNamespace
+
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._ensure_models_imported()
+
+        def turn(start, end, spk):
+            return SimpleNamespace(start=start, end=end), None, spk
+
+        speaker_turns = [turn(0.0, 2.0, 'A'), turn(3.0, 10.0, 'B'), turn(4.0, 4.5, 'A')]
+
+        # Act
+        speakers = app.speakers_at(speaker_turns, [-1.0, 1.0, 2.0, 2.5, 4.2, 6.0, 11.0])
+
+        # Assert - 6.0 falls after the nested A turn but inside the longer B turn
+        assert speakers == [None, 'A', 'A', None, 'A', 'B', None]
+
+    def test_match_speakers_keeps_labels_across_chunks(self):
+        """
+        Verify that a later chunk's speakers map to the nearest earlier centroids, or get new ids.
+        """
+        import numpy as np
+
+        # Arrange
+        transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)._ensure_models_imported()
+        centroids, weights = [], []
+        transcribe_gui._match_speakers(np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]), [10.0, 10.0], centroids, weights)
+
+        # Act - same two voices in swapped order, plus a third unlike either
+        ids = transcribe_gui._match_speakers(
+            np.array([[0.1, 1.0, 0.0], [1.0, 0.1, 0.0], [0.0, 0.0, 1.0]]), [5.0, 5.0, 5.0], centroids, weights
+        )
+        capped = transcribe_gui._match_speakers(
+            np.array([[0.0, 0.3, 1.0]]), [5.0], centroids[:2], weights[:2], max_speakers=2
+        )
+
+        # Assert
+        assert ids == [1, 0, 2]
+        assert weights == [15.0, 15.0, 5.0]
+        assert capped == [1]
+
+    def test_speaker_runs_split_on_speaker_changes(self):
+        """
+        Verify that consecutive same-speaker words become one segment spanning their times.
+        """
+        from types import SimpleNamespace
+
+        # Arrange
+        transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)._ensure_models_imported()
+        words = [SimpleNamespace(word=f" w{i}", start=float(i), end=i + 0.5) for i in range(5)]
+        speakers = ["A", "A", None, "B", "B"]
+
+        # Act
+        runs = transcribe_gui._speaker_runs(words, iter(speakers))
+
+        # Assert
+        assert runs == [
+            transcribe_gui.SegmentWithSpeaker("w0 w1", 0.0, 1.5, "A"),
+            transcribe_gui.SegmentWithSpeaker("w2", 2.0, 2.5, None),
+            transcribe_gui.SegmentWithSpeaker("w3 w4", 3.0, 4.5, "B"),
+        ]
+
+    def test_speaker_runs_break_at_segment_starts(self):
+        """
+        Verify that forced breaks split a same-speaker run and tokens override word text.
+        """
+        from types import SimpleNamespace
+
+        # Arrange
+        transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)._ensure_models_imported()
+        units = [SimpleNamespace(start=float(i), end=i + 0.5) for i in range(4)]
+        tokens = [" a", " b", " Whole segment.", " c"]
+
+        # Act
+        runs = transcribe_gui._speaker_runs(units, ["A"] * 4, tokens=tokens, breaks=[2, 3])
+
+        # Assert
+        assert runs == [
+            transcribe_gui.SegmentWithSpeaker("a b", 0.0, 1.5, "A"),
+            transcribe_gui.SegmentWithSpeaker("Whole segment.", 2.0, 2.5, "A"),
+            transcribe_gui.SegmentWithSpeaker("c", 3.0, 3.5, "A"),
+        ]
+
+    def test_cluster_embeddings_groups_similar_directions(self):
+        """
+        Verify that cosine linkage clustering separates two groups of embeddings.
+        """
+        import numpy as np
+
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._ensure_models_imported()
+        embeddings = np.array([[1.0, 0.0], [0.99, 0.14], [0.0, 1.0], [0.14, 0.99]], dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        # Act
+        speaker_ids = app.cluster_embeddings(embeddings, 2)
+
+        # Assert
+        assert speaker_ids[0] == speaker_ids[1]
+        assert speaker_ids[2] == speaker_ids[3]
+        assert speaker_ids[0] != speaker_ids[2]
+        assert set(speaker_ids) == {0, 1}
+
+
+class TestProgressPolling:
+    """Test suite for worker-to-UI progress polling."""
+
+    def test_poll_progress_redraws_only_when_dirty(self):
+        """
+        Verify that poll_progress() skips UI updates when no new progress was reported.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.root = Mock()
+        app.progress = MagicMock()
+        app.status_var = Mock()
+        app.current_file = None
+        app.is_processing = True
+        app.current_progress = 42.0
+        app.processed_segments = 3
+        app._progress_dirty = True
+        app._ui_queue = transcribe_gui.queue.SimpleQueue()
+
+        # Act
+        app.poll_progress()
+        app.poll_progress()
+
+        # Assert
+        app.status_var.set.assert_called_once_with("Transcribing... 42% (3 segments)")
+        assert app._progress_dirty is False
+        assert app.root.after.call_count == 2
+
+    def test_poll_progress_applies_queued_ui_updates_in_order(self):
+        """
+        Verify that worker UI updates run on the next poll, in order, even after processing ends.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.root = Mock()
+        app.is_processing = False
+        app._ui_queue = transcribe_gui.queue.SimpleQueue()
+        applied = []
+        app._ui_post(lambda: applied.append("row done"))
+        app._ui_post(lambda: applied.append("complete"))
+
+        # Act
+        app.poll_progress()
+
+        # Assert - queue drained, no further poll scheduled once idle
+        assert applied == ["row done", "complete"]
+        assert app._ui_queue.empty()
+        app.root.after.assert_not_called()
+
+
+class TestModelRelease:
+    """Test suite for releasing models when the app is idle."""
+
+    def test_release_models_drops_loaded_models(self):
+        """
+        Verify that release_models() clears model references when not processing.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.is_processing = False
+        app._release_after_id = "after#1"
+        app.model = Mock()
+        app.batched_model = Mock()
+        app.wavlm_model = Mock()
+        app.wavlm_feature_extractor = Mock()
+        app.diarization_pipeline = Mock()
+        app._model_cache = {'whisper': (("medium",), (app.model, app.batched_model))}
+        app._pinned_buffers = {"input_values": Mock()}
+
+        # Act
+        app.release_models()
+
+        # Assert
+        assert app.model is None
+        assert app.batched_model is None
+        assert app.wavlm_model is None
+        assert app.diarization_pipeline is None
+        assert app._model_cache == {}
+        assert app._pinned_buffers == {}
+        assert app._release_after_id is None
+
+    def test_release_models_skipped_while_processing(self):
+        """
+        Verify that a release timer firing mid-transcription leaves the models alone.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.is_processing = True
+        app._release_after_id = "after#1"
+        app.model = Mock()
+
+        # Act
+        app.release_models()
+
+        # Assert
+        assert app.model is not None
+
+
+class TestModelCache:
+    """Test suite for reusing loaded models across transcription runs."""
+
+    def test_cached_model_reused_for_same_settings(self):
+        """
+        Verify that a second run with unchanged settings does not load the model again.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._model_cache = {}
+        load = Mock(side_effect=["model-1", "model-2"])
+
+        # Act
+        first = app._cached_model('whisper', ("medium", "auto", "int8", 4), load)
+        second = app._cached_model('whisper', ("medium", "auto", "int8", 4), load)
+
+        # Assert
+        assert first == second == "model-1"
+        load.assert_called_once_with()
+
+    def test_cached_model_rebuilt_when_settings_change(self):
+        """
+        Verify that changing a setting in the key (e.g. the HF token) replaces the cached model.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._model_cache = {}
+        load = Mock(side_effect=["pipeline-a", "pipeline-b"])
+        app._cached_model('pyannote', "hf_a", load)
+
+        # Act
+        pipeline = app._cached_model('pyannote', "hf_b", load)
+
+        # Assert
+        assert pipeline == "pipeline-b"
+        assert app._model_cache == {'pyannote': ("hf_b", "pipeline-b")}
+
+    def test_failed_load_is_not_cached(self):
+        """
+        Verify that a load error leaves no cache entry so the next run retries.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._model_cache = {'wavlm': ("old", "stale")}
+
+        # Act
+        with pytest.raises(RuntimeError):
+            app._cached_model('wavlm', "new", Mock(side_effect=RuntimeError("download failed")))
+
+        # Assert
+        assert app._model_cache == {}
+
+
+class TestDecodeFile:
+    """Test suite for pre-decoding queued files."""
+
+    def test_decode_file_returns_16k_samples(self, temp_output_dir):
+        """
+        Verify that decode_file() asks faster-whisper for 16kHz audio.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.stop_requested = False
+        audio_file = temp_output_dir / "a.wav"
+
+        # Act
+        with patch('transcribe_gui.decode_audio', return_value="samples") as mock_decode:
+            audio = app.decode_file(audio_file)
+
+        # Assert
+        assert audio == "samples"
+        mock_decode.assert_called_once_with(str(audio_file), sampling_rate=transcribe_gui.SAMPLE_RATE)
+
+    def test_decode_file_failure_returns_none(self, temp_output_dir):
+        """
+        Verify that a decode error falls back to None so transcription can decode the file itself.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.stop_requested = False
+
+        # Act
+        with patch('transcribe_gui.decode_audio', side_effect=RuntimeError("bad file")):
+            audio = app.decode_file(temp_output_dir / "broken.mp3")
+
+        # Assert
+        assert audio is None
+
+    def test_background_work_runs_on_daemon_threads(self):
+        """
+        Verify that prefetch/diarization helpers run on daemon threads so closing the window never waits.
+        """
+        import threading
+
+        # Act
+        future = transcribe_gui._submit_daemon(lambda: threading.current_thread().daemon, "decode")
+
+        # Assert
+        assert future.result(timeout=5) is True
+
+    def test_decode_file_skipped_after_stop(self, temp_output_dir):
+        """
+        Verify that a prefetched decode does no work once a stop has been requested.
+        """
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.stop_requested = True
+
+        # Act
+        with patch('transcribe_gui.decode_audio') as mock_decode:
+            audio = app.decode_file(temp_output_dir / "next.mp3")
+
+        # Assert
+        assert audio is None
+        mock_decode.assert_not_called()
+
+
+class TestTranscriptOutput:
+    """Test suite for writing transcripts from transcribe_file()."""
+
+    def _make_app(self, output_dir):
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.output_folder = str(output_dir)
+        app._output_dir = output_dir
+        app._output_format = "with_timestamps"
+        app.model = Mock()
+        app.batched_model = None
+        app.wavlm_model = None
+        app.wavlm_feature_extractor = None
+        app.diarization_pipeline = None
+        app.stop_requested = False
+        app.processed_segments = 0
+        app.root = Mock()
+        return app
+
+    def test_without_diarization_segments_are_streamed_to_file(self, temp_output_dir):
+        """
+        Verify that the streamed transcript has the header and every segment in order.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        segments = iter([
+            Mock(start=0.0, end=1.0, text=" Hello", words=None),
+            Mock(start=61.0, end=62.0, text=" world", words=None),
+        ])
+        app.model.transcribe.return_value = (segments, Mock(language="en", duration=62.0))
+
+        # Act
+        result = app.transcribe_file(temp_output_dir / "talk.mp3", audio="samples")
+
+        # Assert
+        content = (temp_output_dir / "talk.txt").read_text(encoding='utf-8')
+        assert result is True
+        assert app.processed_segments == 2
+        assert content.startswith("Transcript: talk.mp3\nLanguage: en\nDuration: 62.00 seconds\n")
+        assert content.endswith("[00:00:00 --> 00:00:01]\nHello\n\n[00:01:01 --> 00:01:02]\nworld\n\n")
+
+    def test_failed_stream_leaves_previous_transcript_untouched(self, temp_output_dir):
+        """
+        Verify that an error mid-transcription discards the temp file and keeps the old transcript.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        app._ui_queue = transcribe_gui.queue.SimpleQueue()
+        (temp_output_dir / "talk.txt").write_text("previous", encoding='utf-8')
+
+        def segments():
+            yield Mock(start=0.0, end=1.0, text=" Hello", words=None)
+            raise RuntimeError("decoder crashed")
+
+        app.model.transcribe.return_value = (segments(), Mock(language="en", duration=2.0))
+
+        # Act
+        result = app.transcribe_file(temp_output_dir / "talk.mp3", audio="samples")
+
+        # Assert
+        assert result is False
+        assert (temp_output_dir / "talk.txt").read_text(encoding='utf-8') == "previous"
+        assert not (temp_output_dir / "talk.txt.tmp").exists()
+
+    def test_stop_mid_stream_leaves_previous_transcript_untouched(self, temp_output_dir):
+        """
+        Verify that stopping mid-transcription discards the temp file and keeps the old transcript.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        (temp_output_dir / "talk.txt").write_text("previous", encoding='utf-8')
+
+        def segments():
+            yield Mock(start=0.0, end=1.0, text=" Hello", words=None)
+            app.stop_requested = True
+            yield Mock(start=1.0, end=2.0, text=" world", words=None)
+
+        app.model.transcribe.return_value = (segments(), Mock(language="en", duration=2.0))
+
+        # Act
+        result = app.transcribe_file(temp_output_dir / "talk.mp3", audio="samples")
+
+        # Assert
+        assert result is None
+        assert (temp_output_dir / "talk.txt").read_text(encoding='utf-8') == "previous"
+        assert not (temp_output_dir / "talk.txt.tmp").exists()
+
+    def test_progress_is_published_in_whole_percent_steps(self, temp_output_dir):
+        """
+        Verify that segments advancing progress by less than one point are not published.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        segments = iter([
+            Mock(start=0.0, end=0.5, text=" a", words=None),
+            Mock(start=0.5, end=10.0, text=" b", words=None),
+            Mock(start=10.0, end=10.4, text=" c", words=None),
+        ])
+        app.model.transcribe.return_value = (segments, Mock(language="en", duration=100.0))
+
+        # Act
+        app.transcribe_file(temp_output_dir / "steps.mp3", audio="samples")
+
+        # Assert
+        assert app.processed_segments == 3
+        assert app.current_progress == 10.0
+
+    def test_with_diarization_transcript_is_written_after_all_segments(self, temp_output_dir):
+        """
+        Verify that with a diarization model loaded the buffered path still writes the transcript.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        app._output_format = "plain"
+        app._num_speakers = 0
+        app.diarization_pipeline = Mock(side_effect=RuntimeError("no diarization"))
+        segment = Mock(start=0.0, end=1.0, text=" Hi", words=None, no_speech_prob=0.1)
+        app.model.transcribe.return_value = (iter([segment]), Mock(language="en", duration=1.0))
+
+        # Act
+        with patch('transcribe_gui.torch'):
+            result = app.transcribe_file(temp_output_dir / "hi.mp3", audio="samples")
+
+        # Assert
+        assert result is True
+        assert (temp_output_dir / "hi.txt").read_text(encoding='utf-8').endswith("-\n\nHi\n\n")
+
+    def test_deferred_diarization_is_returned_as_a_callable(self, temp_output_dir):
+        """
+        Verify that defer_diarization leaves diarizing and writing to a callable that skips progress updates.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        app._output_format = "plain"
+        app._num_speakers = 0
+        app.diarization_pipeline = Mock(side_effect=RuntimeError("no diarization"))
+        segment = Mock(start=0.0, end=1.0, text=" Hi", words=None, no_speech_prob=0.1)
+        app.model.transcribe.return_value = (iter([segment]), Mock(language="en", duration=1.0))
+
+        # Act
+        finish = app.transcribe_file(temp_output_dir / "hi.mp3", audio="samples", defer_diarization=True)
+        written_before_finish = (temp_output_dir / "hi.txt").exists()
+        with patch('transcribe_gui.torch'):
+            result = finish()
+
+        # Assert
+        assert written_before_finish is False
+        assert result is True
+        assert app.current_progress == 95.0
+        assert (temp_output_dir / "hi.txt").read_text(encoding='utf-8').endswith("-\n\nHi\n\n")
+
+    def test_pyannote_turns_are_cached_per_audio(self, temp_output_dir):
+        """
+        Verify that re-running the same source file reuses the saved speaker turns instead of pyannote.
+        """
+        from types import SimpleNamespace
+        import numpy as np
+
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        app._output_format = "plain"
+        app._num_speakers = 0
+        app._ensure_models_imported()
+        turns = [(SimpleNamespace(start=0.0, end=1.0), "T0", "SPEAKER_01")]
+        app.diarization_pipeline = Mock(return_value=Mock(
+            speaker_diarization=Mock(itertracks=Mock(return_value=iter(turns)))
+        ))
+        audio = np.zeros(16000, dtype=np.float32)
+        (temp_output_dir / "hi.mp3").write_bytes(b"audio")
+
+        def run():
+            segment = Mock(start=0.0, end=1.0, text=" Hi", words=None, no_speech_prob=0.1)
+            app.model.transcribe.return_value = (iter([segment]), Mock(language="en", duration=1.0))
+            app.transcribe_file(temp_output_dir / "hi.mp3", audio=audio)
+            return (temp_output_dir / "hi.txt").read_text(encoding='utf-8')
+
+        # Act
+        with patch('transcribe_gui.DIARIZATION_CACHE_DIR', temp_output_dir / "cache"):
+            first = run()
+            second = run()
+
+        # Assert
+        assert app.diarization_pipeline.call_count == 1
+        assert first == second
+        assert first.endswith("SPEAKER_01: Hi\n\n")
+
+    def test_diarization_cache_keeps_only_most_recent_entries(self, temp_output_dir):
+        """
+        Verify that saving a diarization cache entry prunes the least recently used files past the cap.
+        """
+        import os
+        from types import SimpleNamespace
+
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        cache_dir = temp_output_dir / "cache"
+        cache_dir.mkdir()
+        for i in range(3):
+            stale = cache_dir / f"old{i}.json"
+            stale.write_bytes(b"[]")
+            os.utime(stale, ns=(i * 10**9, i * 10**9))
+        turns = [(SimpleNamespace(start=0.0, end=1.0), None, "SPEAKER_00")]
+
+        # Act
+        with patch('transcribe_gui.DIARIZATION_CACHE_DIR', cache_dir), \
+                patch('transcribe_gui.DIARIZATION_CACHE_MAX_FILES', 2):
+            app.save_cached_turns(cache_dir / "new.json", turns)
+
+        # Assert
+        assert sorted(f.name for f in cache_dir.iterdir()) == ["new.json", "old2.json"]
+
+    def test_diarization_cache_key_follows_source_file(self, temp_output_dir):
+        """
+        Verify that the cache entry changes when the source file is modified and is skipped when it is missing.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        source = temp_output_dir / "talk.mp3"
+        source.write_bytes(b"first")
+        before = app.diarization_cache_file(source, None)
+
+        # Act
+        source.write_bytes(b"second take")
+        after = app.diarization_cache_file(source, None)
+        missing = app.diarization_cache_file(temp_output_dir / "gone.mp3", None)
+
+        # Assert
+        assert before != after
+        assert after == app.diarization_cache_file(source, None)
+        assert missing is None
+
+    def test_long_audio_is_diarized_in_chunks_with_consistent_labels(self):
+        """
+        Verify that chunked pyannote turns are offset to file time and labelled by embedding match.
+        """
+        from types import SimpleNamespace
+        import numpy as np
+
+        # Arrange
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app._ensure_models_imported()
+        chunks = iter([
+            (["A", "B"], [[1.0, 0.0], [0.0, 1.0]]),
+            (["X", "Y"], [[0.0, 1.0], [1.0, 0.0]]),  # same voices, labelled the other way round
+        ])
+
+        def pipeline(file, **kwargs):
+            labels, embeddings = next(chunks)
+            tracks = [(SimpleNamespace(start=0.0, end=0.5), None, labels[0]),
+                      (SimpleNamespace(start=0.5, end=1.0), None, labels[1])]
+            return SimpleNamespace(
+                speaker_embeddings=np.array(embeddings),
+                speaker_diarization=Mock(itertracks=Mock(return_value=iter(tracks)), labels=Mock(return_value=labels)),
+            )
+
+        app.diarization_pipeline = Mock(side_effect=pipeline)
+        audio = np.zeros(2 * transcribe_gui.SAMPLE_RATE, dtype=np.float32)
+
+        # Act
+        with patch('transcribe_gui.DIARIZATION_CHUNK_SECONDS', 1):
+            turns = app.run_pyannote(audio, None)
+
+        # Assert
+        assert [(turn.start, turn.end, spk) for turn, _, spk in turns] == [
+            (0.0, 0.5, "SPEAKER_00"), (0.5, 1.0, "SPEAKER_01"),
+            (1.0, 1.5, "SPEAKER_01"), (1.5, 2.0, "SPEAKER_00"),
+        ]
+        assert app.diarization_pipeline.call_args.kwargs == {"max_speakers": None}
+
+    def test_deferred_diarization_does_nothing_after_stop(self, temp_output_dir):
+        """
+        Verify that a diarization queued before a stop neither runs the pipeline nor writes the file.
+        """
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        app._output_format = "plain"
+        app._num_speakers = 0
+        app.diarization_pipeline = Mock()
+        segment = Mock(start=0.0, end=1.0, text=" Hi", words=None, no_speech_prob=0.1)
+        app.model.transcribe.return_value = (iter([segment]), Mock(language="en", duration=1.0))
+        finish = app.transcribe_file(temp_output_dir / "hi.mp3", audio="samples", defer_diarization=True)
+
+        # Act
+        app.stop_requested = True
+        result = finish()
+
+        # Assert
+        assert result is None
+        app.diarization_pipeline.assert_not_called()
+        assert not (temp_output_dir / "hi.txt").exists()
+
+    def test_diarized_runs_are_written_with_their_speaker(self, temp_output_dir):
+        """
+        Verify that re-segmented speaker runs are written with the label they carry.
+        """
+        from types import SimpleNamespace
+
+        # Arrange
+        app = self._make_app(temp_output_dir)
+        app._output_format = "plain"
+        app._num_speakers = 1
+        app.wavlm_model = Mock()
+        app.wavlm_feature_extractor = Mock()
+        words = [SimpleNamespace(word=" Hi", start=0.0, end=0.5), SimpleNamespace(word=" there", start=0.5, end=1.0)]
+        segment = Mock(start=0.0, end=1.0, text=" Hi there", words=words, no_speech_prob=0.1)
+        app.model.transcribe.return_value = (iter([segment]), Mock(language="en", duration=1.0))
+
+        # Act
+        app._ensure_models_imported()
+        result = app.transcribe_file(temp_output_dir / "hi.mp3", audio="samples")
+
+        # Assert
+        assert result is True
+        assert (temp_output_dir / "hi.txt").read_text(encoding='utf-8').endswith("-\n\nSPEAKER_00: Hi there\n\n")
 
 
 class TestMediaExtensions:
@@ -598,14 +1562,46 @@ class TestMediaExtensions:
         assert ".mov" in transcribe_gui.MEDIA_EXTENSIONS
         assert ".m4a" in transcribe_gui.MEDIA_EXTENSIONS
 
-    def test_media_extensions_includes_uppercase(self):
+    def test_media_extensions_are_lowercase(self):
+        """
+        Verify that MEDIA_EXTENSIONS is an immutable set of lowercase extensions.
+        """
+        # Assert
+        assert isinstance(transcribe_gui.MEDIA_EXTENSIONS, frozenset)
+        assert all(ext == ext.lower() for ext in transcribe_gui.MEDIA_EXTENSIONS)
+
+    def test_media_filetypes_cover_every_extension(self):
         """
-        Verify that MEDIA_EXTENSIONS includes uppercase variants.
+        Verify that the precomputed file dialog filter lists each extension in both cases.
         """
+        # Act
+        patterns = set(dict(transcribe_gui.MEDIA_FILETYPES)["Media Files"].split())
+
+        # Assert
+        for ext in transcribe_gui.MEDIA_EXTENSIONS:
+            assert f"*{ext}" in patterns
+            assert f"*{ext.upper()}" in patterns
+
+    @patch('transcribe_gui.Tk')
+    def test_add_files_accepts_any_extension_case(self, mock_tk, temp_output_dir):
+        """
+        Verify that uppercase and mixed-case extensions are accepted.
+        """
+        # Arrange
+        files = [temp_output_dir / "a.MP3", temp_output_dir / "b.Mp4", temp_output_dir / "c.WAV"]
+        for f in files:
+            f.touch()
+
+        app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        app.file_queue = []
+        app.update_file_list = Mock()
+        app.update_start_button = Mock()
+
+        # Act
+        app.add_files_to_queue([str(f) for f in files])
+
         # Assert
-        assert ".MP3" in transcribe_gui.MEDIA_EXTENSIONS
-        assert ".WAV" in transcribe_gui.MEDIA_EXTENSIONS
-        assert ".MP4" in transcribe_gui.MEDIA_EXTENSIONS
+        assert app.file_queue == files
 
 
 # Example working test
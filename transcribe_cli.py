@@ -8,19 +8,26 @@ import os
 import sys
 import json
 import argparse
+from bisect import bisect_left
+from itertools import chain, groupby
+from operator import attrgetter
 from pathlib import Path
 
 # Import transcription dependencies
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    # Older faster-whisper releases only have sequential transcription
+    BatchedInferencePipeline = None
 
 # Optional: WavLM for speaker diarization
 try:
     from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
     import torch
-    import torchaudio
     from sklearn.cluster import AgglomerativeClustering
     import numpy as np
-    from collections import Counter
     HAS_WAVLM = True
 except ImportError:
     HAS_WAVLM = False
@@ -33,6 +40,16 @@ except ImportError:
     HAS_PYANNOTE = False
 
 
+# Sliding windows per WavLM forward pass
+EMBEDDING_BATCH_SIZE = 32
+
+# Shorter speech is labelled SPEAKER_00 without running WavLM
+MIN_DIARIZATION_SECONDS = 3.0
+
+# Whisper and WavLM both expect 16kHz mono input
+SAMPLE_RATE = 16000
+
+
 def progress_print(value, message):
     """Output progress in format: PROGRESS:value:message"""
     print(f"PROGRESS:{value:.2f}:{message}", flush=True)
@@ -43,13 +60,81 @@ def output_print(file_path):
     print(f"OUTPUT:{file_path}", flush=True)
 
 
+def pick_torch_device():
+    """Pick the device for WavLM inference: CUDA, then Apple MPS, then CPU"""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def transcript_header(audio_path, info):
+    """Transcript header: file name, detected language and duration"""
+    return (f"Transcript: {Path(audio_path).name}\n"
+            f"Language: {info.language}\n"
+            f"Duration: {info.duration:.2f} seconds\n"
+            + "-" * 80 + "\n\n")
+
+
+def write_transcript(output_path, text):
+    """Write the transcript to a temp file, then swap it in so a crash never leaves a partial one"""
+    output_path = Path(output_path)
+    tmp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        tmp_path.replace(output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def cosine_distances(embeddings):
+    """Pairwise cosine distances between L2-normalized embeddings, from a single matrix product"""
+    distances = 1.0 - embeddings @ embeddings.T
+    np.fill_diagonal(distances, 0.0)
+    return np.clip(distances, 0.0, 2.0)
+
+
+def vote_word_speakers(num_words, windows, window_speaker_ids):
+    """Majority-vote a speaker id per word from the windows containing it (-1 if none do)
+
+    Ties go to the speaker of the earliest such window.
+    """
+    window_speaker_ids = np.asarray(window_speaker_ids)
+    num_windows = len(windows)
+    num_speakers = int(window_speaker_ids.max()) + 1
+
+    # Flatten window membership into parallel (window, word) index arrays
+    counts = np.fromiter((len(w['word_indices']) for w in windows), dtype=np.intp, count=num_windows)
+    window_idx = np.repeat(np.arange(num_windows), counts)
+    word_idx = np.fromiter(chain.from_iterable(w['word_indices'] for w in windows),
+                           dtype=np.intp, count=int(counts.sum()))
+    vote_speakers = window_speaker_ids[window_idx]
+
+    votes = np.bincount(word_idx * num_speakers + vote_speakers,
+                        minlength=num_words * num_speakers).reshape(num_words, num_speakers)
+    first_window = np.full((num_words, num_speakers), num_windows, dtype=np.intp)
+    np.minimum.at(first_window, (word_idx, vote_speakers), window_idx)
+
+    # Among the top-voted speakers, prefer the one seen in the earliest window
+    top = votes == votes.max(axis=1, keepdims=True)
+    labels = np.where(top, first_window, num_windows).argmin(axis=1)
+    labels[votes.sum(axis=1) == 0] = -1
+    return labels
+
+
 def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
     """Transcribe audio file with WavLM speaker diarization"""
     progress_print(0.1, f"Starting transcription: {Path(audio_path).name}")
 
+    # Decode to 16kHz mono once; Whisper and WavLM both read these samples
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
     # Transcribe with Whisper
     segments, info = model.transcribe(
-        audio_path,
+        audio,
         language=None,
         beam_size=5,
         vad_filter=True,
@@ -71,20 +156,21 @@ def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
 
     if not all_words:
         progress_print(0.7, "No words found, skipping diarization")
-        speaker_labels = {}
+    elif num_speakers <= 1 or all_words[-1].end - all_words[0].start < MIN_DIARIZATION_SECONDS:
+        # Nothing to tell apart, so skip WavLM inference and clustering
+        progress_print(0.7, "Single speaker, skipping diarization")
+        for word in all_words:
+            word.speaker = "SPEAKER_00"
     else:
         progress_print(0.7, f"Running speaker diarization on {len(all_words)} words...")
 
         # Load WavLM models
+        device = pick_torch_device()
         feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
-        wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv')
+        wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv').to(device).eval()
 
-        # Load audio
-        waveform, sample_rate = torchaudio.load(audio_path)
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-            waveform = resampler(waveform)
-            sample_rate = 16000
+        # Reuse the samples already decoded for Whisper
+        waveform, sample_rate = torch.from_numpy(audio).unsqueeze(0), SAMPLE_RATE
 
         # Create sliding windows
         WINDOW_SIZE = 1.0
@@ -93,17 +179,21 @@ def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
         segments_for_embedding = []
         total_duration = all_words[-1].end if all_words else 0
 
+        # Word centers are computed once; words are chronological but centers need not be,
+        # so windows are located by bisecting a sorted copy
+        word_centers = [(w.start + w.end) / 2 for w in all_words]
+        center_order = sorted(range(len(word_centers)), key=word_centers.__getitem__)
+        sorted_centers = [word_centers[i] for i in center_order]
+
         current_time = 0
         while current_time < total_duration:
             window_start = current_time
             window_end = min(current_time + WINDOW_SIZE, total_duration)
 
-            # Find words in this window
-            window_word_indices = []
-            for i, word in enumerate(all_words):
-                word_center = (word.start + word.end) / 2
-                if window_start <= word_center < window_end:
-                    window_word_indices.append(i)
+            # Find words in this window (window_start <= center < window_end)
+            lo = bisect_left(sorted_centers, window_start)
+            hi = bisect_left(sorted_centers, window_end, lo)
+            window_word_indices = sorted(center_order[lo:hi])
 
             if window_word_indices:
                 segments_for_embedding.append({
@@ -116,10 +206,9 @@ def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
 
         progress_print(0.75, f"Extracting embeddings for {len(segments_for_embedding)} windows...")
 
-        # Extract embeddings
-        embeddings_list = []
-        valid_segments = []
-
+        # Slice window audio (mixed down to mono) for batched embedding
+        window_audios = []
+        windows = []
         for seg_info in segments_for_embedding:
             try:
                 start_sample = int(seg_info['start'] * sample_rate)
@@ -130,84 +219,80 @@ def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
                 if segment_audio.shape[1] < 1600:  # Less than 0.1 seconds
                     continue
 
+                window_audios.append(segment_audio.mean(dim=0).numpy())
+                windows.append(seg_info)
+            except Exception as e:
+                continue
+
+        # Extract embeddings, EMBEDDING_BATCH_SIZE windows per forward pass
+        embeddings_list = []
+        valid_segments = []
+
+        for batch_start in range(0, len(windows), EMBEDDING_BATCH_SIZE):
+            batch_windows = windows[batch_start:batch_start + EMBEDDING_BATCH_SIZE]
+            try:
                 inputs = feature_extractor(
-                    segment_audio.squeeze().numpy(),
-                    sampling_rate=16000,
+                    window_audios[batch_start:batch_start + EMBEDDING_BATCH_SIZE],
+                    sampling_rate=SAMPLE_RATE,
                     return_tensors="pt",
                     padding=True
                 )
 
-                with torch.no_grad():
-                    embedding = wavlm_model(**inputs).embeddings
-                    embedding = torch.nn.functional.normalize(embedding, dim=-1)
+                inputs = {k: v.to(device, non_blocking=True) for k, v in inputs.items()}
+
+                with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=torch.float16, enabled=(device == "cuda")):
+                    embeddings = wavlm_model(**inputs).embeddings
+                # Normalize in fp32 so fp16 embeddings don't underflow
+                embeddings = torch.nn.functional.normalize(embeddings.float(), dim=-1)
 
-                embeddings_list.append(embedding[0].cpu().numpy())
-                valid_segments.append(seg_info)
+                embeddings = embeddings.cpu().numpy()
             except Exception as e:
                 continue
 
+            # Drop windows whose embedding came out as NaN
+            for seg_info, embedding in zip(batch_windows, embeddings):
+                if not np.isnan(embedding).any():
+                    embeddings_list.append(embedding)
+                    valid_segments.append(seg_info)
+
+        # Words in no window (or every word, if clustering is skipped) default to SPEAKER_00
+        for word in all_words:
+            word.speaker = "SPEAKER_00"
+
         if len(embeddings_list) < num_speakers:
             progress_print(0.8, f"Not enough data for {num_speakers} speakers, using 1")
-            num_speakers = 1
-
-        # Cluster embeddings
-        embeddings_array = np.array(embeddings_list)
-        progress_print(0.85, f"Clustering {len(embeddings_array)} embeddings...")
-
-        clustering = AgglomerativeClustering(
-            n_clusters=num_speakers,
-            metric='cosine',
-            linkage='average'
-        )
-        speaker_ids = clustering.fit_predict(embeddings_array)
-
-        # Assign speaker labels to segments
-        for i, seg_info in enumerate(valid_segments):
-            seg_info['speaker'] = f"SPEAKER_{speaker_ids[i]:02d}"
-
-        # Assign speakers to words using majority voting
-        for word_idx, word in enumerate(all_words):
-            speaker_votes = []
-            for seg_info in valid_segments:
-                if word_idx in seg_info['word_indices']:
-                    speaker_votes.append(seg_info['speaker'])
-
-            if speaker_votes:
-                speaker_counts = Counter(speaker_votes)
-                word.speaker = speaker_counts.most_common(1)[0][0]
-            else:
-                word.speaker = "SPEAKER_00"
+        else:
+            # Cluster embeddings
+            embeddings_array = np.array(embeddings_list)
+            progress_print(0.85, f"Clustering {len(embeddings_array)} embeddings...")
+
+            clustering = AgglomerativeClustering(
+                n_clusters=num_speakers,
+                metric='precomputed',
+                linkage='average'
+            )
+            speaker_ids = clustering.fit_predict(cosine_distances(embeddings_array))
+
+            # Assign speakers to words using majority voting
+            word_speaker_ids = vote_word_speakers(len(all_words), valid_segments, speaker_ids)
+            for word, speaker_id in zip(all_words, word_speaker_ids):
+                if speaker_id >= 0:
+                    word.speaker = f"SPEAKER_{speaker_id:02d}"
 
     progress_print(0.9, "Writing transcript...")
 
-    # Write output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"Transcript: {Path(audio_path).name}\n")
-        f.write(f"Language: {info.language}\n")
-        f.write(f"Duration: {info.duration:.2f} seconds\n")
-        f.write("-" * 80 + "\n\n")
-
-        # Group words by speaker
-        if all_words and hasattr(all_words[0], 'speaker'):
-            current_speaker = None
-            current_text = []
-
-            for word in all_words:
-                speaker = getattr(word, 'speaker', 'SPEAKER_00')
-                if speaker != current_speaker:
-                    if current_text:
-                        f.write(f"{current_speaker}: {' '.join(current_text)}\n\n")
-                    current_speaker = speaker
-                    current_text = [word.word.strip()]
-                else:
-                    current_text.append(word.word.strip())
-
-            if current_text:
-                f.write(f"{current_speaker}: {' '.join(current_text)}\n\n")
-        else:
-            # No diarization - just write segments
-            for segment in segments_list:
-                f.write(f"{segment.text.strip()}\n\n")
+    # Build the whole transcript, then write it once
+    parts = [transcript_header(audio_path, info)]
+    if all_words and hasattr(all_words[0], 'speaker'):
+        # Group words by speaker (word tokens carry their own leading space, so each
+        # turn is joined as-is and stripped once)
+        for speaker, words in groupby(all_words, key=attrgetter('speaker')):
+            parts.append(f"{speaker}: {''.join(word.word for word in words).strip()}\n\n")
+    else:
+        # No diarization - just write segments
+        parts.extend(f"{segment.text.strip()}\n\n" for segment in segments_list)
+
+    write_transcript(output_path, "".join(parts))
 
     progress_print(1.0, "Complete")
     return output_path
@@ -230,15 +315,9 @@ def transcribe_simple(model, audio_path, output_path):
     segments_list = list(segments)
     progress_print(0.7, f"Processing {len(segments_list)} segments...")
 
-    # Write output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"Transcript: {Path(audio_path).name}\n")
-        f.write(f"Language: {info.language}\n")
-        f.write(f"Duration: {info.duration:.2f} seconds\n")
-        f.write("-" * 80 + "\n\n")
-
-        for segment in segments_list:
-            f.write(f"{segment.text.strip()}\n\n")
+    # Build the whole transcript, then write it once
+    write_transcript(output_path, transcript_header(audio_path, info)
+                     + "".join(f"{segment.text.strip()}\n\n" for segment in segments_list))
 
     progress_print(1.0, "Complete")
     return output_path
@@ -277,6 +356,9 @@ def main():
     # Load Whisper model
     progress_print(0.0, f"Loading Whisper {model_size} model...")
     model = WhisperModel(model_size, device="auto", compute_type="auto")
+    if BatchedInferencePipeline is not None:
+        # Same transcribe() interface, but VAD chunks are decoded together in batched forward passes
+        model = BatchedInferencePipeline(model=model)
 
     # Process each file
     total_files = len(audio_files)
@@ -6,11 +6,25 @@ Designed following Apple Human Interface Guidelines for macOS
 
 import os
 import sys
+import importlib.util
 import threading
+import gc
+import hashlib
 import json
+import logging
+import re
 import multiprocessing
+import queue
+import traceback
+from dataclasses import dataclass, asdict, fields
+from typing import Optional
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from itertools import chain, islice, repeat
+from functools import lru_cache, partial
+from concurrent.futures import Future
 from pathlib import Path
-from tkinter import Tk, Frame, Label, Button, Text, Scrollbar, filedialog, StringVar, BooleanVar, IntVar, Checkbutton, Entry
+from tkinter import Tk, Frame, Label, Button, Scrollbar, filedialog, StringVar, BooleanVar, IntVar, Checkbutton, Entry
 from tkinter import ttk
 import tkinter as tk
 
@@ -20,44 +34,325 @@ try:
 except ImportError:
     HAS_DND = False
 
-from faster_whisper import WhisperModel
-
-# Try to import pyannote for speaker diarization (optional)
-try:
-    from pyannote.audio import Pipeline
-    HAS_DIARIZATION = True
-    print("DEBUG: pyannote.audio loaded successfully - HAS_DIARIZATION=True")
-except ImportError as e:
-    HAS_DIARIZATION = False
-    Pipeline = None
-    print(f"DEBUG: pyannote.audio NOT available - HAS_DIARIZATION=False ({e})")
-
-# Try to import WavLM and sklearn for speaker diarization (does not require HF token)
+# orjson for faster config (de)serialization (optional)
 try:
-    from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
-    import torch
-    import torchaudio
-    from sklearn.cluster import AgglomerativeClustering
-    import numpy as np
-    HAS_WAVLM = True
-    print("DEBUG: WavLM loaded successfully - HAS_WAVLM=True")
-except ImportError as e:
-    HAS_WAVLM = False
-    print(f"DEBUG: WavLM NOT available - HAS_WAVLM=False ({e})")
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# Debug output is off unless TA_DEBUG is set, so UI callbacks don't format and flush log lines
+log = logging.getLogger("transcribe_gui")
+if os.environ.get("TA_DEBUG"):
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.DEBUG)
+
+
+def _module_available(name):
+    """Check whether a module is installed without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def _pick_compute_type():
+    """Choose the fastest Whisper compute type for the available hardware"""
+    try:
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
+            return "int8_float16"
+    except ImportError:
+        pass
+    # CTranslate2 has no MPS backend, so Apple Silicon also runs on CPU where int8 is fastest
+    return "int8"
+
+
+# Heavy ML dependencies are imported on first use by TranscriptionApp._ensure_models_imported()
+# so the window can appear without waiting for torch/transformers/faster-whisper to load
+WhisperModel = None
+BatchedInferencePipeline = None
+decode_audio = None
+Pipeline = None
+Wav2Vec2FeatureExtractor = None
+WavLMForXVector = None
+torch = None
+torchaudio = None
+linkage = None
+fcluster = None
+squareform = None
+np = None
+
+# pyannote for speaker diarization (optional)
+HAS_DIARIZATION = _module_available("pyannote.audio")
+log.debug("pyannote.audio available - HAS_DIARIZATION=%s", HAS_DIARIZATION)
+
+# WavLM and scipy for speaker diarization (does not require HF token)
+HAS_WAVLM = all(_module_available(name) for name in ("transformers", "torch", "torchaudio", "scipy", "numpy"))
+log.debug("WavLM available - HAS_WAVLM=%s", HAS_WAVLM)
+
+
+
+def _submit_daemon(fn, name):
+    """Run fn on its own daemon thread and return a Future for its result
+
+    Used to decode the next queued file and to diarize the previous one alongside transcription.
+    Daemon threads (unlike a ThreadPoolExecutor's) never hold up interpreter exit when the window closes.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
 
 # Configuration file path
-CONFIG_FILE = Path.home() / '.transcribe_anything_config.json'
+HOME_DIR = os.path.expanduser('~')
+CONFIG_FILE = Path(HOME_DIR) / '.transcribe_anything_config.json'
+# Pyannote speaker turns per source file, so re-running a file skips diarization
+DIARIZATION_CACHE_DIR = Path(HOME_DIR) / '.transcribe_anything_cache' / 'diarization'
+DIARIZATION_CACHE_MAX_FILES = 200  # least recently used entries beyond this are pruned
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
 
 # Configuration
 MODEL_SIZE = "medium"
 DEVICE = "auto"
-COMPUTE_TYPE = "auto"
-MEDIA_EXTENSIONS = {
+COMPUTE_TYPE = "auto"  # "auto" resolves per device via _pick_compute_type()
+COMPUTE_TYPE_CHOICES = ("auto", "int8_float16", "float16", "int8", "float32")
+WHISPER_BATCH_SIZE = 8  # VAD chunks per batched Whisper forward pass
+SAMPLE_RATE = 16000  # Whisper and WavLM both expect 16kHz mono input
+PROGRESS_POLL_MS = 200  # How often the Tk thread checks for worker progress
+PROGRESS_MIN_STEP = 1.0  # Percentage points of progress before the worker publishes again
+MODEL_IDLE_RELEASE_MS = 5 * 60 * 1000  # Free model memory after this long without a transcription
+CONFIG_SAVE_DELAY_MS = 400  # Debounce delay for config writes
+WAVLM_BATCH_SIZE = 32  # Sliding windows per WavLM forward pass
+NO_SPEECH_THRESHOLD = 0.4  # Whisper segments at or above this no_speech_prob are not embedded
+SILENCE_RMS = 1e-3  # Windows quieter than this RMS are not embedded
+MIN_DIARIZATION_SECONDS = 3.0  # Shorter speech is labelled SPEAKER_00 without running WavLM
+DIARIZATION_CHUNK_SECONDS = 300  # Longer audio is diarized by pyannote in pieces of this length
+SPEAKER_MATCH_DISTANCE = 0.75  # Max cosine distance for a chunk's speaker to reuse an earlier speaker's label
+SCANDIR_MIN_FILES = 100  # Dropped files sharing a folder above this count are checked with one listing
+# Lowercase only; compare against Path.suffix.lower()
+MEDIA_EXTENSIONS = frozenset({
     ".mp4", ".mov", ".avi", ".mkv", ".webm",
-    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus",
-    ".MP4", ".MOV", ".AVI", ".MKV", ".WEBM",
-    ".MP3", ".WAV", ".M4A", ".FLAC", ".OGG", ".AAC", ".WMA", ".OPUS"
-}
+    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus"
+})
+# Case-insensitive suffix match for raw path strings, derived from MEDIA_EXTENSIONS
+_MEDIA_RE = re.compile(
+    r"(?:" + "|".join(re.escape(ext) for ext in sorted(MEDIA_EXTENSIONS)) + r")\Z", re.IGNORECASE
+)
+# File dialog filter, built once (upper-case variants for case-sensitive platforms)
+MEDIA_FILETYPES = (
+    ("Media Files", " ".join(f"*{ext} *{ext.upper()}" for ext in sorted(MEDIA_EXTENSIONS))),
+    ("All Files", "*.*"),
+)
+
+
+def _iter_media(root):
+    """Yield media file paths under root, walking with os.scandir (name order, depth-first)"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Could not read folder {directory}: {e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            # DirEntry caches the file type from the directory listing, so no extra stat calls here
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif _MEDIA_RE.search(entry.name) and entry.is_file():
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+@lru_cache(maxsize=4096)
+def _hms(total_seconds):
+    """Format whole seconds as HH:MM:SS"""
+    minutes, secs = divmod(total_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+class _StopTranscription(Exception):
+    """Raised inside transcribe_file when the user stops, so a streamed temp file is discarded"""
+
+
+@contextmanager
+def _atomic_open(path, buffering=-1):
+    """Open a temp file beside path for text writes; it replaces path only if the block doesn't raise"""
+    tmp_file = path.with_suffix(path.suffix + '.tmp')
+    f = open(tmp_file, 'w', encoding='utf-8', buffering=buffering)
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        tmp_file.unlink(missing_ok=True)
+        raise
+    f.close()
+    tmp_file.replace(path)
+
+
+def _existing_files(paths):
+    """Return the subset of paths that are existing files
+
+    Large groups from one folder are checked against a single os.scandir listing instead of a
+    stat per file, which is what makes big drops from network drives slow.
+    """
+    by_parent = {}
+    for path in paths:
+        by_parent.setdefault(os.path.dirname(path), []).append(path)
+
+    existing = set()
+    for parent, group in by_parent.items():
+        if len(group) <= SCANDIR_MIN_FILES:
+            existing.update(path for path in group if os.path.isfile(path))
+            continue
+        try:
+            with os.scandir(parent or os.curdir) as it:
+                names = {entry.name for entry in it if entry.is_file()}
+        except OSError as e:
+            print(f"Could not read folder {parent}: {e}")
+            continue
+        existing.update(path for path in group if os.path.basename(path) in names)
+    return existing
+
+
+def _json_loads(data):
+    """Parse JSON bytes, using orjson when available"""
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+def _json_dumps(obj):
+    """Serialize to UTF-8 JSON bytes, using orjson when available"""
+    return orjson.dumps(obj) if HAS_ORJSON else json.dumps(obj).encode('utf-8')
+
+
+@dataclass(slots=True)
+class AppConfig:
+    """Settings persisted to CONFIG_FILE"""
+    output_folder: Optional[str] = None
+    remember_folder: bool = False
+    cpu_threads: Optional[int] = None  # None = all cores
+    compute_type: str = COMPUTE_TYPE
+    output_format: str = "with_timestamps"
+    enable_diarization: bool = False
+    hf_token: str = ""
+    num_speakers: int = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a loaded config, ignoring keys this version doesn't know about"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+@dataclass(slots=True)
+class TranscriptSegment:
+    """The fields of a faster-whisper Segment that diarization and output actually use"""
+    start: float
+    end: float
+    text: str
+    words: Optional[list] = None
+    no_speech_prob: float = 0.0
+
+
+@dataclass(slots=True)
+class TurnSpan:
+    """Start and end of a diarization turn loaded from the cache, standing in for a pyannote Segment"""
+    start: float
+    end: float
+
+
+def _match_speakers(embeddings, durations, centroids, weights, max_speakers=None):
+    """Map one chunk's speakers onto the running per-speaker centroids, returning a global id per speaker
+
+    Closest pairs within SPEAKER_MATCH_DISTANCE are matched first, and each matched centroid moves to
+    the speech-duration-weighted mean of itself and the new embedding. Unmatched speakers get a new
+    id, unless max_speakers are already known, in which case they join the nearest one.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    valid = ~np.isnan(embeddings).any(axis=1)
+    unit = np.zeros_like(embeddings)
+    unit[valid] = embeddings[valid] / np.linalg.norm(embeddings[valid], axis=1, keepdims=True)
+
+    distances = np.full((len(embeddings), len(centroids)), np.inf)
+    if centroids:
+        known = np.array(centroids)
+        known /= np.maximum(np.linalg.norm(known, axis=1, keepdims=True), 1e-12)
+        distances[valid] = 1.0 - unit[valid] @ known.T
+
+    ids = [None] * len(embeddings)
+    for local, known_id in zip(*np.unravel_index(np.argsort(distances, axis=None), distances.shape)):
+        if distances[local, known_id] > SPEAKER_MATCH_DISTANCE:
+            break
+        if ids[local] is None and known_id not in ids:
+            ids[local] = known_id = int(known_id)
+            total = weights[known_id] + durations[local]
+            if total > 0:
+                centroids[known_id] = (weights[known_id] * centroids[known_id] + durations[local] * unit[local]) / total
+            weights[known_id] = total
+
+    for local, known_id in enumerate(ids):
+        if known_id is not None:
+            continue
+        if centroids and (not valid[local] or (max_speakers and len(centroids) >= max_speakers)):
+            # No room for another speaker (or nothing to compare): join the nearest, else the most heard
+            ids[local] = int(distances[local].argmin()) if valid[local] else int(np.argmax(weights))
+        else:
+            ids[local] = len(centroids)
+            centroids.append(unit[local])
+            weights.append(durations[local])
+    return ids
+
+
+@dataclass(slots=True)
+class SegmentWithSpeaker:
+    """A re-segmented stretch of transcript attributed to one speaker"""
+    text: str
+    start: float
+    end: float
+    speaker: Optional[str]
+
+
+def _speaker_runs(words, speakers, tokens=None, breaks=()):
+    """Split consecutive words into one SegmentWithSpeaker per run of the same speaker
+
+    Runs also end before each index in breaks. tokens overrides the text taken from each word.
+    """
+    if not isinstance(words, list):
+        words = list(words)
+    if not words:
+        return []
+
+    # Runs break wherever a word's speaker differs from the previous word's, or at a forced break
+    speakers = np.array(list(speakers), dtype=object)
+    boundary = speakers[1:] != speakers[:-1]
+    boundary[np.asarray(breaks, dtype=np.intp) - 1] = True
+    bounds = [0, *(np.flatnonzero(boundary) + 1).tolist(), len(words)]
+
+    # faster-whisper word tokens carry their own leading space, so one join and a single
+    # strip of the run replace a strip per word (and keep unspaced scripts unspaced)
+    if tokens is None:
+        tokens = [word.word for word in words]
+    return [
+        SegmentWithSpeaker(''.join(tokens[start:end]).strip(), words[start].start, words[end - 1].end, speakers[start])
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
 
 # macOS System Colors (HIG-compliant)
 COLORS = {
@@ -132,12 +427,12 @@ class MacButton(tk.Frame):
             self.label.bind('<Leave>', self._on_leave)
 
     def _on_click(self):
-        print(f"DEBUG: Button clicked! State: {self.state}, Text: {self.label.cget('text')}")
+        log.debug("Button clicked! State: %s, Text: %s", self.state, self.label.cget('text'))
         if self.state == 'normal' and self.command:
-            print("DEBUG: Calling command...")
+            log.debug("Calling command...")
             self.command()
         else:
-            print(f"DEBUG: Button is disabled or has no command")
+            log.debug("Button is disabled or has no command")
 
     def _on_enter(self, event):
         if self.state == 'normal':
@@ -182,6 +477,11 @@ class MacButton(tk.Frame):
 
 
 class TranscriptionApp:
+    # Set once the lazily imported ML dependencies are available as module globals
+    _models_imported = False
+    # Bytes last read from or written to CONFIG_FILE, so unchanged settings aren't rewritten
+    _last_config_bytes = None
+
     def __init__(self, root, dnd_enabled=False):
         self.root = root
         self.dnd_enabled = dnd_enabled
@@ -192,14 +492,16 @@ class TranscriptionApp:
         self.root.resizable(True, True)  # Enable corner resizing
 
         self.model = None
+        self.batched_model = None
         self.output_folder = None
-        self.file_queue = []
+        self.file_queue = deque()
         self.is_processing = False
         self.remember_folder = BooleanVar()
 
         # Performance settings
         self.cpu_cores = multiprocessing.cpu_count()
         self.cpu_threads = IntVar(value=self.cpu_cores)  # Use all cores by default
+        self.compute_type = StringVar(value=COMPUTE_TYPE)
 
         # Output format settings
         self.output_format = StringVar(value="with_timestamps")  # "with_timestamps" or "plain_text"
@@ -211,22 +513,37 @@ class TranscriptionApp:
         # WavLM models for diarization (no HF token required)
         self.wavlm_feature_extractor = None
         self.wavlm_model = None
+        self.wavlm_device = "cpu"
+        self._resamplers = {}  # Source sample rate -> cached torchaudio Resample module
+        self._pinned_buffers = {}  # WavLM input name -> reusable pinned host staging buffer (CUDA only)
         self.use_wavlm = BooleanVar(value=True)  # Use WavLM by default (doesn't need token)
         self.num_speakers = IntVar(value=0)  # 0 = auto-detect
         self.diarization_pipeline = None
+        self._model_cache = {}  # Model name -> (settings key, loaded model(s)), reused across runs
 
-        # Progress tracking (thread-safe)
-        self.progress_lock = threading.Lock()
+        # Progress tracking (no lock: attribute writes are atomic under the GIL and only the
+        # Tk thread reads them; the worker sets _progress_dirty after each update)
         self.current_progress = 0.0  # 0-100
+        self._progress_dirty = False
+        self._ui_queue = queue.SimpleQueue()  # Worker -> Tk thread UI updates, drained by poll_progress
         self.processed_segments = 0
         self.total_segments_estimate = 0
 
         # Selected file tracking
         self.selected_file_index = None
 
+        # File currently being transcribed (for per-row progress in the queue)
+        self.current_file = None
+
         # Stop flag for canceling transcription
         self.stop_requested = False
 
+        # Pending debounced save_config() timer
+        self._save_after_id = None
+
+        # Pending idle release_models() timer
+        self._release_after_id = None
+
         # Load saved configuration
         self.load_config()
 
@@ -408,24 +725,25 @@ class TranscriptionApp:
         scrollbar = Scrollbar(list_container)
         scrollbar.pack(side='right', fill='y')
 
-        self.file_listbox = Text(list_container,
-                                height=3,
-                                font=('SF Pro Text', 11),
-                                bg=COLORS['control_bg'],
-                                fg=COLORS['text_primary'],
-                                relief='solid',
-                                borderwidth=1,
-                                padx=10,
-                                pady=6,
-                                yscrollcommand=scrollbar.set,
-                                state='disabled',
-                                wrap='word',
-                                cursor='arrow')
-        self.file_listbox.pack(side='left', fill='both', expand=True)
-        scrollbar.config(command=self.file_listbox.yview)
-
-        # Bind click event for file selection
-        self.file_listbox.bind('<Button-1>', self.on_file_click)
+        # Treeview rows are updated individually, so progress updates don't redraw the whole queue
+        self.file_tree = ttk.Treeview(list_container,
+                                      columns=("status", "progress"),
+                                      show="tree",
+                                      height=3,
+                                      selectmode='browse',
+                                      style="Queue.Treeview",
+                                      yscrollcommand=scrollbar.set)
+        self.file_tree.column("#0", stretch=True)
+        self.file_tree.column("status", width=100, anchor='w', stretch=False)
+        self.file_tree.column("progress", width=50, anchor='e', stretch=False)
+        self.file_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.config(command=self.file_tree.yview)
+
+        # Maps queued file path to its Treeview row id
+        self.file_row_ids = {}
+
+        # Bind selection event for file selection
+        self.file_tree.bind('<<TreeviewSelect>>', self.on_file_select)
 
         # Remove selected file button
         self.remove_btn = MacButton(parent, text="Remove Selected",
@@ -455,6 +773,25 @@ class TranscriptionApp:
                        background=COLORS['accent'],
                        borderwidth=0,
                        thickness=6)
+        style.configure("Queue.Treeview",
+                       font=('SF Pro Text', 11),
+                       background=COLORS['control_bg'],
+                       fieldbackground=COLORS['control_bg'],
+                       foreground=COLORS['text_primary'],
+                       rowheight=22)
+        style.map("Queue.Treeview",
+                  background=[('selected', COLORS['accent'])],
+                  foreground=[('selected', 'white')])
+
+        # Shared look for the Settings tab toggles, defined once instead of per widget
+        for settings_style in ("Settings.TCheckbutton", "Settings.TRadiobutton"):
+            style.configure(settings_style,
+                           font=('SF Pro Text', 12),
+                           background=COLORS['secondary_bg'],
+                           foreground=COLORS['text_primary'])
+            style.map(settings_style,
+                      background=[('active', COLORS['secondary_bg'])],
+                      foreground=[('active', COLORS['text_primary'])])
 
         self.progress = ttk.Progressbar(parent,
                                        mode='determinate',
@@ -517,6 +854,24 @@ class TranscriptionApp:
                                   command=self.save_config)
         cpu_spinbox.pack(side='right')
 
+        # Compute type setting (power users)
+        compute_frame = Frame(perf_well, bg=COLORS['secondary_bg'])
+        compute_frame.pack(fill='x', padx=12, pady=(0, 8))
+
+        Label(compute_frame,
+              text="Compute type",
+              font=('SF Pro Text', 12),
+              bg=COLORS['secondary_bg'],
+              fg=COLORS['text_primary']).pack(side='left')
+
+        compute_combo = ttk.Combobox(compute_frame,
+                                     values=COMPUTE_TYPE_CHOICES,
+                                     textvariable=self.compute_type,
+                                     state='readonly',
+                                     width=12)
+        compute_combo.pack(side='right')
+        compute_combo.bind('<<ComboboxSelected>>', lambda event: self.save_config())
+
         # Performance info label
         perf_info = Label(perf_well,
                          text="Higher values use more CPU but may speed up transcription",
@@ -539,32 +894,19 @@ class TranscriptionApp:
         output_well.pack(fill='x', pady=(0, 10))
 
         # Radio buttons for output format
-        from tkinter import Radiobutton
-        self.radio_timestamp = Radiobutton(output_well,
+        self.radio_timestamp = ttk.Radiobutton(output_well,
                    text="With timestamps (for subtitles)",
                    variable=self.output_format,
                    value="with_timestamps",
-                   font=('SF Pro Text', 12),
-                   bg=COLORS['secondary_bg'],
-                   fg=COLORS['text_primary'],
-                   activebackground=COLORS['secondary_bg'],
-                   activeforeground=COLORS['text_primary'],
-                   selectcolor=COLORS['secondary_bg'],
-                   highlightthickness=0,
+                   style="Settings.TRadiobutton",
                    command=self.save_config)
         self.radio_timestamp.pack(anchor='w', padx=12, pady=(12, 6))
 
-        self.radio_plaintext = Radiobutton(output_well,
+        self.radio_plaintext = ttk.Radiobutton(output_well,
                    text="Plain text (conversational)",
                    variable=self.output_format,
                    value="plain_text",
-                   font=('SF Pro Text', 12),
-                   bg=COLORS['secondary_bg'],
-                   fg=COLORS['text_primary'],
-                   activebackground=COLORS['secondary_bg'],
-                   activeforeground=COLORS['text_primary'],
-                   selectcolor=COLORS['secondary_bg'],
-                   highlightthickness=0,
+                   style="Settings.TRadiobutton",
                    command=self.save_config)
         self.radio_plaintext.pack(anchor='w', padx=12, pady=(0, 12))
 
@@ -590,33 +932,23 @@ class TranscriptionApp:
                 current = self.enable_diarization.get()
                 new_value = not current
                 self.enable_diarization.set(new_value)
-                print(f"DEBUG: Manually toggled diarization from {current} to {new_value}")
+                log.debug("Manually toggled diarization from %s to %s", current, new_value)
 
                 # Update checkbox visual state
-                if new_value:
-                    self.diarization_checkbox.select()
-                else:
-                    self.diarization_checkbox.deselect()
+                self.diarization_checkbox.state(['selected' if new_value else '!selected'])
 
                 self.save_config()
 
-            self.diarization_checkbox = Checkbutton(diarization_well,
+            self.diarization_checkbox = ttk.Checkbutton(diarization_well,
                        text="Enable speaker identification",
-                       font=('SF Pro Text', 12),
-                       bg=COLORS['secondary_bg'],
-                       fg=COLORS['text_primary'],
-                       activebackground=COLORS['secondary_bg'],
-                       activeforeground=COLORS['text_primary'],
-                       selectcolor=COLORS['secondary_bg'],
-                       highlightthickness=0,
+                       style="Settings.TCheckbutton",
                        command=on_checkbox_toggle)
             self.diarization_checkbox.pack(anchor='w', padx=12, pady=(12, 10))
 
-            # Set initial state from saved config
-            if self.enable_diarization.get():
-                self.diarization_checkbox.select()
+            # Set initial state from saved config (clear 'alternate', which ttk shows when there's no variable)
+            self.diarization_checkbox.state(['!alternate', 'selected' if self.enable_diarization.get() else '!selected'])
 
-            print(f"DEBUG: Created diarization checkbox - variable id: {id(self.enable_diarization)}")
+            log.debug("Created diarization checkbox - variable id: %s", id(self.enable_diarization))
 
             # HF Token entry
             token_frame = Frame(diarization_well, bg=COLORS['secondary_bg'])
@@ -648,7 +980,7 @@ class TranscriptionApp:
             def save_token(event):
                 token_value = self.token_entry.get()
                 self.hf_token.set(token_value)
-                print(f"DEBUG: Token field FocusOut - token length: {len(token_value)}")
+                log.debug("Token field FocusOut - token length: %s", len(token_value))
                 self.save_config()
 
             self.token_entry.bind('<FocusOut>', save_token)
@@ -683,37 +1015,61 @@ class TranscriptionApp:
         """Load saved configuration from file"""
         try:
             if CONFIG_FILE.exists():
-                with open(CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    self.output_folder = config.get('output_folder')
-                    self.remember_folder.set(config.get('remember_folder', False))
-                    self.cpu_threads.set(config.get('cpu_threads', self.cpu_cores))
-                    self.output_format.set(config.get('output_format', 'with_timestamps'))
-                    self.enable_diarization.set(config.get('enable_diarization', False))
-                    self.hf_token.set(config.get('hf_token', ''))
-                    self.num_speakers.set(config.get('num_speakers', 0))
+                data = CONFIG_FILE.read_bytes()
+                config = AppConfig.from_dict(_json_loads(data))
+                self._last_config_bytes = data
+                self.output_folder = config.output_folder
+                self.remember_folder.set(config.remember_folder)
+                self.cpu_threads.set(config.cpu_threads if config.cpu_threads is not None else self.cpu_cores)
+                self.compute_type.set(config.compute_type)
+                self.output_format.set(config.output_format)
+                self.enable_diarization.set(config.enable_diarization)
+                self.hf_token.set(config.hf_token)
+                self.num_speakers.set(config.num_speakers)
         except Exception as e:
             print(f"Could not load config: {e}")
 
     def save_config(self):
+        """Schedule a config write, coalescing rapid changes into a single write"""
+        if self._save_after_id is not None:
+            self.root.after_cancel(self._save_after_id)
+        self._save_after_id = self.root.after(CONFIG_SAVE_DELAY_MS, self._save_config_now)
+
+    def flush_config(self):
+        """Write any pending config change immediately"""
+        if self._save_after_id is not None:
+            self.root.after_cancel(self._save_after_id)
+            self._save_config_now()
+
+    def _save_config_now(self):
         """Save configuration to file"""
+        self._save_after_id = None
         try:
             diarization_val = self.enable_diarization.get()
             token_val = self.hf_token.get()
-            print(f"DEBUG: save_config called - BooleanVar={diarization_val} (type: {type(diarization_val)}), variable id: {id(self.enable_diarization)}")
-
-            config = {
-                'output_folder': self.output_folder if self.remember_folder.get() else None,
-                'remember_folder': self.remember_folder.get(),
-                'cpu_threads': self.cpu_threads.get(),
-                'output_format': self.output_format.get(),
-                'enable_diarization': diarization_val,
-                'hf_token': token_val,
-                'num_speakers': self.num_speakers.get()
-            }
-            print(f"DEBUG: Saving config - diarization={config['enable_diarization']}, token_length={len(config['hf_token'])}")
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f)
+            log.debug("save_config called - BooleanVar=%s (type: %s), variable id: %s", diarization_val, type(diarization_val), id(self.enable_diarization))
+
+            config = AppConfig(
+                output_folder=self.output_folder if self.remember_folder.get() else None,
+                remember_folder=self.remember_folder.get(),
+                cpu_threads=self.cpu_threads.get(),
+                compute_type=self.compute_type.get(),
+                output_format=self.output_format.get(),
+                enable_diarization=diarization_val,
+                hf_token=token_val,
+                num_speakers=self.num_speakers.get()
+            )
+            data = _json_dumps(asdict(config))
+            if data == self._last_config_bytes:
+                log.debug("Config unchanged, skipping write")
+                return
+
+            log.debug("Saving config - diarization=%s, token_length=%s", config.enable_diarization, len(config.hf_token))
+            # Write to a temp file and swap it in so a crash can't leave a torn config
+            tmp_file = CONFIG_FILE.with_suffix('.tmp')
+            tmp_file.write_bytes(data)
+            tmp_file.replace(CONFIG_FILE)
+            self._last_config_bytes = data
         except Exception as e:
             print(f"Could not save config: {e}")
 
@@ -741,7 +1097,7 @@ class TranscriptionApp:
             "AI Models:\n"
             f"• OpenAI Whisper ({MODEL_SIZE})\n"
             f"• Device: {DEVICE}\n"
-            f"• Compute: {COMPUTE_TYPE}"
+            f"• Compute: {self.compute_type.get()}"
             f"{diarization_info}\n"
             "All processing happens locally on your computer.\n"
             "No data is sent to external services.\n\n"
@@ -751,7 +1107,7 @@ class TranscriptionApp:
 
     def choose_output_folder(self):
         # Default to user's home directory, or saved folder if available
-        initial_dir = self.output_folder if self.output_folder else str(Path.home())
+        initial_dir = self.output_folder or HOME_DIR
 
         folder = filedialog.askdirectory(
             title="Select Output Folder",
@@ -768,10 +1124,7 @@ class TranscriptionApp:
     def add_files(self):
         files = filedialog.askopenfilenames(
             title="Select Audio or Video Files",
-            filetypes=[
-                ("Media Files", " ".join(f"*{ext}" for ext in MEDIA_EXTENSIONS)),
-                ("All Files", "*.*")
-            ]
+            filetypes=MEDIA_FILETYPES
         )
         if files:
             self.add_files_to_queue(files)
@@ -781,40 +1134,72 @@ class TranscriptionApp:
         self.add_files_to_queue(files)
 
     def add_files_to_queue(self, files):
+        # Set lookup keeps large drops linear instead of scanning the queue per file
+        queued = set(self.file_queue)
+        files = [file_path.strip('{}') for file_path in files]
+        existing = _existing_files([file_path for file_path in files if _MEDIA_RE.search(file_path)])
         for file_path in files:
-            file_path = file_path.strip('{}')
-            path = Path(file_path)
-            if path.is_file() and path.suffix in MEDIA_EXTENSIONS:
-                if path not in self.file_queue:
+            if _MEDIA_RE.search(file_path):
+                if file_path not in existing:
+                    continue
+                paths = [file_path]
+            elif os.path.isdir(file_path):
+                # Dropped folders are walked recursively for media files
+                paths = _iter_media(file_path)
+            else:
+                continue
+
+            for media_path in paths:
+                path = Path(media_path)
+                if path not in queued:
+                    queued.add(path)
                     self.file_queue.append(path)
 
         self.update_file_list()
         self.update_start_button()
 
     def update_file_list(self):
-        self.file_listbox.config(state='normal')
-        self.file_listbox.delete(1.0, 'end')
-
-        # Clear any existing tags
-        self.file_listbox.tag_delete('selected')
+        """Sync the queue Treeview with file_queue, touching only rows that changed"""
+        # file_row_ids is kept in queue order, so its positions are the rows' current positions
+        queued = set(self.file_queue)
+        removed = [(pos, file_path) for pos, file_path in enumerate(self.file_row_ids) if file_path not in queued]
+        if removed:
+            self.file_tree.delete(*(self.file_row_ids.pop(file_path) for _, file_path in removed))
+            # Rows after the first removed one shifted up, so refresh just their numbering
+            first_shifted = removed[0][0]
+            shifted = islice(self.file_queue, first_shifted, len(self.file_row_ids))
+            for i, file_path in enumerate(shifted, first_shifted + 1):
+                self.file_tree.item(self.file_row_ids[file_path], text=f"{i}. {file_path.name}")
 
         if self.file_queue:
-            for i, file_path in enumerate(self.file_queue, 1):
-                line_start = self.file_listbox.index('end-1c')
-                self.file_listbox.insert('end', f"{i}. {file_path.name}\n")
-                line_end = self.file_listbox.index('end-1c')
-
-                # Highlight selected file
-                if self.selected_file_index == i - 1:
-                    self.file_listbox.tag_add('selected', line_start, line_end)
-                    self.file_listbox.tag_config('selected', background=COLORS['accent'], foreground='white')
+            if self.file_tree.exists('placeholder'):
+                self.file_tree.delete('placeholder')
+
+            # Files are only ever appended, so only the unrendered tail needs rows
+            rendered = len(self.file_row_ids)
+            for i, file_path in enumerate(islice(self.file_queue, rendered, None), rendered + 1):
+                iid = self.file_tree.insert('', 'end', text=f"{i}. {file_path.name}", values=("Queued", ""))
+                self.file_row_ids[file_path] = iid
+
+            # Highlight selected file
+            if self.selected_file_index is not None and self.selected_file_index < len(self.file_queue):
+                self.file_tree.selection_set(self.file_row_ids[self.file_queue[self.selected_file_index]])
         else:
-            self.file_listbox.insert('end', "No files added")
+            if not self.file_tree.exists('placeholder'):
+                self.file_tree.insert('', 'end', iid='placeholder', text="No files added", values=("", ""))
             self.selected_file_index = None
 
-        self.file_listbox.config(state='disabled')
         self.update_remove_button()
 
+    def set_file_status(self, file_path, status, progress=None):
+        """Update the status (and optionally progress) cell of a single queue row"""
+        iid = self.file_row_ids.get(file_path)
+        if iid is None:
+            return
+        self.file_tree.set(iid, "status", status)
+        if progress is not None:
+            self.file_tree.set(iid, "progress", f"{progress:.0f}%")
+
     def update_remove_button(self):
         """Enable/disable remove button based on selection and processing state"""
         if self.selected_file_index is not None and not self.is_processing:
@@ -822,27 +1207,25 @@ class TranscriptionApp:
         else:
             self.remove_btn.config(state='disabled')
 
-    def on_file_click(self, event):
-        """Handle click on file list to select a file"""
-        if not self.file_queue or self.is_processing:
+    def on_file_select(self, event):
+        """Handle selection in the file list"""
+        selection = self.file_tree.selection()
+        if not self.file_queue or self.is_processing or not selection:
             return
 
-        # Get the line number that was clicked
-        index = self.file_listbox.index(f"@{event.x},{event.y}")
-        line_num = int(index.split('.')[0])
-
-        # Convert line number to file index (0-based)
-        file_index = line_num - 1
+        # Convert row to file index (0-based)
+        file_index = self.file_tree.index(selection[0])
 
         if 0 <= file_index < len(self.file_queue):
             self.selected_file_index = file_index
-            self.update_file_list()
+            self.update_remove_button()
 
     def remove_selected_file(self):
         """Remove the selected file from the queue"""
         if self.selected_file_index is not None and not self.is_processing:
             if 0 <= self.selected_file_index < len(self.file_queue):
-                removed_file = self.file_queue.pop(self.selected_file_index)
+                removed_file = self.file_queue[self.selected_file_index]
+                del self.file_queue[self.selected_file_index]
                 print(f"Removed file from queue: {removed_file.name}")
 
                 # Clear selection
@@ -859,25 +1242,30 @@ class TranscriptionApp:
             self.start_button.config(state='disabled')
 
     def start_transcription(self):
-        print("DEBUG: Start transcription clicked!")
-        print(f"DEBUG: Files in queue: {len(self.file_queue)}")
-        print(f"DEBUG: Output folder: {self.output_folder}")
+        log.debug("Start transcription clicked!")
+        if self._release_after_id is not None:
+            self.root.after_cancel(self._release_after_id)
+            self._release_after_id = None
+        log.debug("Files in queue: %s", len(self.file_queue))
+        log.debug("Output folder: %s", self.output_folder)
 
         # Get values from tkinter variables BEFORE starting thread
         # (tkinter variables can only be accessed from main thread)
         cpu_threads = self.cpu_threads.get()
+        compute_type = self.compute_type.get()
         output_format = self.output_format.get()
         enable_diarization = self.enable_diarization.get()
         hf_token = self.hf_token.get()
         num_speakers = self.num_speakers.get()
         use_wavlm = self.use_wavlm.get()
 
-        print(f"DEBUG: CPU Threads: {cpu_threads}")
-        print(f"DEBUG: Output format: {output_format}")
-        print(f"DEBUG: Diarization enabled: {enable_diarization}")
-        print(f"DEBUG: HF Token: '{hf_token}' (length: {len(hf_token)})")
-        print(f"DEBUG: Num speakers: {num_speakers}")
-        print(f"DEBUG: Use WavLM: {use_wavlm}")
+        log.debug("CPU Threads: %s", cpu_threads)
+        log.debug("Compute type: %s", compute_type)
+        log.debug("Output format: %s", output_format)
+        log.debug("Diarization enabled: %s", enable_diarization)
+        log.debug("HF Token length: %s", len(hf_token))
+        log.debug("Num speakers: %s", num_speakers)
+        log.debug("Use WavLM: %s", use_wavlm)
 
         self.is_processing = True
         self.stop_requested = False
@@ -893,29 +1281,73 @@ class TranscriptionApp:
         self.progress.config(mode='determinate', value=0)
 
         # Reset progress tracking variables to prevent showing stale values
-        with self.progress_lock:
-            self.current_progress = 0.0
-            self.processed_segments = 0
-            self.total_segments_estimate = 0
+        self.current_progress = 0.0
+        self.processed_segments = 0
+        self.total_segments_estimate = 0
+        self._progress_dirty = True
 
         # Pass the values to the thread
         thread = threading.Thread(
             target=self.process_files,
-            args=(cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm),
+            args=(cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm, compute_type),
             daemon=True
         )
         thread.start()
 
     def stop_transcription(self):
         """Request to stop the current transcription"""
-        print("DEBUG: Stop requested")
+        log.debug("Stop requested")
         self.stop_requested = True
         self.status_var.set("Stopping transcription (may take 30-60 seconds)...")
         self.stop_button.config(state='disabled')
 
-    def process_files(self, cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm):
-        print("DEBUG: process_files() started")
+    def _ensure_models_imported(self):
+        """Import faster-whisper and the optional diarization dependencies on first use"""
+        global WhisperModel, BatchedInferencePipeline, decode_audio, Pipeline, Wav2Vec2FeatureExtractor, WavLMForXVector
+        global torch, torchaudio, linkage, fcluster, squareform, np
+        global HAS_DIARIZATION, HAS_WAVLM
+
+        if TranscriptionApp._models_imported:
+            return
+
+        from faster_whisper import WhisperModel, decode_audio
+
         try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            # Older faster-whisper releases only have sequential transcription
+            BatchedInferencePipeline = None
+
+        if HAS_DIARIZATION:
+            try:
+                from pyannote.audio import Pipeline
+                import torch
+                import numpy as np
+            except ImportError as e:
+                HAS_DIARIZATION = False
+                log.debug("pyannote.audio failed to import - HAS_DIARIZATION=False (%s)", e)
+
+        if HAS_WAVLM:
+            try:
+                from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
+                import torch
+                import torchaudio
+                from scipy.cluster.hierarchy import linkage, fcluster
+                from scipy.spatial.distance import squareform
+                import numpy as np
+            except ImportError as e:
+                HAS_WAVLM = False
+                log.debug("WavLM failed to import - HAS_WAVLM=False (%s)", e)
+
+        TranscriptionApp._models_imported = True
+
+    def process_files(self, cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm,
+                      compute_type=COMPUTE_TYPE):
+        log.debug("process_files() started")
+        try:
+            # Import ML dependencies here, on the worker thread, rather than at startup
+            self._ensure_models_imported()
+
             # Store parameters as instance attributes so transcribe_file() can access them
             self._cpu_threads = cpu_threads
             self._use_wavlm = use_wavlm
@@ -923,14 +1355,22 @@ class TranscriptionApp:
             self._enable_diarization = enable_diarization
             self._hf_token = hf_token
             self._num_speakers = num_speakers
-
-            # Initialize model with user-configured CPU threads
-            print(f"DEBUG: Initializing model with {cpu_threads} CPU threads")
-            self.model = WhisperModel(
-                MODEL_SIZE,
-                device=DEVICE,
-                compute_type=COMPUTE_TYPE,
-                cpu_threads=cpu_threads
+            # Built once per run rather than per file
+            self._output_dir = Path(self.output_folder)
+
+            # Initialize model with user-configured CPU threads and compute type
+            if compute_type == "auto":
+                compute_type = _pick_compute_type()
+
+            # Models stay cached between runs and are only rebuilt when the settings they were built
+            # with change. Active references are cleared first so a replaced model can be freed.
+            self.model = self.batched_model = None
+            self.wavlm_feature_extractor = self.wavlm_model = None
+            self.diarization_pipeline = None
+
+            self.model, self.batched_model = self._cached_model(
+                'whisper', (MODEL_SIZE, DEVICE, compute_type, cpu_threads),
+                lambda: self.load_whisper(compute_type, cpu_threads)
             )
 
             # Initialize diarization models if enabled
@@ -938,11 +1378,9 @@ class TranscriptionApp:
                 # Try WavLM first (doesn't require HF token)
                 if HAS_WAVLM and self._use_wavlm:
                     try:
-                        print("Initializing WavLM speaker diarization...")
-                        self.root.after(0, lambda: self.status_var.set("Loading WavLM models..."))
-                        self.wavlm_feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
-                        self.wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv')
-                        print("WavLM models loaded successfully")
+                        self.wavlm_device, self.wavlm_feature_extractor, self.wavlm_model = self._cached_model(
+                            'wavlm', 'microsoft/wavlm-base-plus-sv', self.load_wavlm
+                        )
                     except Exception as e:
                         error_msg = str(e)[:50]
                         print(f"Failed to load WavLM models: {e}")
@@ -953,24 +1391,14 @@ class TranscriptionApp:
                 # Fall back to pyannote if WavLM failed or not available and HF token is provided
                 if not self.wavlm_model and HAS_DIARIZATION and hf_token:
                     try:
-                        print("Initializing pyannote speaker diarization pipeline...")
-                        self.root.after(0, lambda: self.status_var.set("Loading speaker diarization model..."))
-                        self.diarization_pipeline = Pipeline.from_pretrained(
-                            "pyannote/speaker-diarization-3.1",
-                            token=hf_token
+                        self.diarization_pipeline = self._cached_model(
+                            'pyannote', hf_token, lambda: self.load_diarization_pipeline(hf_token)
                         )
-                        print("Diarization pipeline loaded successfully")
                     except Exception as e:
                         error_msg = str(e)[:50]
                         print(f"Failed to load diarization pipeline: {e}")
                         self.root.after(0, lambda msg=error_msg: self.status_var.set(f"Diarization error: {msg}"))
                         self.diarization_pipeline = None
-                else:
-                    self.diarization_pipeline = None
-            else:
-                self.wavlm_feature_extractor = None
-                self.wavlm_model = None
-                self.diarization_pipeline = None
 
             # Switch to determinate progress mode
             self.root.after(0, lambda: self.progress.stop())
@@ -981,468 +1409,769 @@ class TranscriptionApp:
             self.root.after(0, lambda msg=models_loaded: self.status_var.set(msg))
 
             # Start polling progress from main thread
-            self.root.after(100, self.poll_progress)
+            self.root.after(PROGRESS_POLL_MS, self.poll_progress)
 
-            total_files = len(self.file_queue)
-            for i, file_path in enumerate(self.file_queue, 1):
+            files = list(self.file_queue)
+            total_files = len(files)
+            next_audio = _submit_daemon(partial(self.decode_file, files[0]), "decode") if files else None
+            pending = None  # (file, future) of the diarization overlapping this file's transcription
+            for i, file_path in enumerate(files, 1):
                 # Check if stop was requested
                 if self.stop_requested:
                     print("Transcription stopped by user")
                     break
 
-                # Update status
-                self.root.after(0, lambda f=file_path, idx=i, total=total_files:
+                # Queue up the next file's decode so it overlaps with this file's inference
+                audio_future = next_audio
+                next_audio = _submit_daemon(partial(self.decode_file, files[i]), "decode") if i < total_files else None
+
+                # Update status and the file's row (both applied on the next poll tick; the
+                # progress bar itself is driven by poll_progress from the current file's progress)
+                self.current_file = file_path
+                self._ui_post(lambda f=file_path, idx=i, total=total_files:
                               self.status_var.set(f"Transcribing {idx} of {total}: {f.name}"))
+                self._ui_post(lambda f=file_path: self.set_file_status(f, "Transcribing", 0))
 
-                # Update progress bar - show progress based on file completion
-                progress_percent = int(((i - 1) / total_files) * 100)
-                self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
+                result = self.transcribe_file(file_path, audio_future.result(), defer_diarization=True)
+                self.current_file = None
 
-                self.transcribe_file(file_path)
+                # Wait for the previous file's diarization before queueing this one, so at most one
+                # finished transcript (and its audio) is held while the next file transcribes
+                if pending:
+                    self.post_file_result(pending[0], pending[1].result())
+                    pending = None
 
-                # Update progress after file completes
-                progress_percent = int((i / total_files) * 100)
-                self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
+                if callable(result):
+                    self._ui_post(lambda f=file_path: self.set_file_status(f, "Diarizing", 95))
+                    pending = (file_path, _submit_daemon(result, "diarize"))
+                else:
+                    self.post_file_result(file_path, result)
+
+            # A stop drops the next file's prefetched audio; a pending diarization sees the stop and bails
+            if next_audio:
+                next_audio.cancel()
+            if pending:
+                self.post_file_result(pending[0], pending[1].result())
 
-            self.root.after(0, self.transcription_complete)
+            # Queued behind the per-file updates so they are all applied first
+            self._ui_post(self.transcription_complete)
 
         except Exception as e:
             print(f"ERROR in process_files(): {e}")
-            import traceback
             traceback.print_exc()
             self.root.after(0, lambda: self.status_var.set(f"Error: {str(e)}"))
             self.root.after(0, lambda: self.progress.stop())
             self.root.after(0, lambda: self.progress.config(mode='determinate', value=0))
             self.is_processing = False
 
-    def transcribe_file(self, file_path):
+    def post_file_result(self, file_path, result):
+        """Queue the final status of a file's row: Done, Failed, or Stopped (result is None)"""
+        if result:
+            self._ui_post(lambda: self.set_file_status(file_path, "Done", 100))
+        elif result is False:
+            self._ui_post(lambda: self.set_file_status(file_path, "Failed"))
+        else:
+            self._ui_post(lambda: self.set_file_status(file_path, "Stopped"))
+
+    def _cached_model(self, name, key, load):
+        """Return the model cached under name if it was built with key, otherwise load and cache it"""
+        cached = self._model_cache.get(name)
+        if cached is not None and cached[0] == key:
+            log.debug("Reusing cached %s model", name)
+            return cached[1]
+
+        # Drop the stale entry before loading so two copies are never resident at once
+        self._model_cache.pop(name, None)
+        cached = None
+        gc.collect()
+        model = load()
+        self._model_cache[name] = (key, model)
+        return model
+
+    def load_whisper(self, compute_type, cpu_threads):
+        """Load the Whisper model, plus a batched pipeline over it when supported"""
+        log.debug("Initializing model with %s CPU threads, compute_type=%s", cpu_threads, compute_type)
+        model = WhisperModel(
+            MODEL_SIZE,
+            device=DEVICE,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads
+        )
+        # Batch VAD chunks through the encoder when supported
+        return model, BatchedInferencePipeline(model=model) if BatchedInferencePipeline else None
+
+    def load_wavlm(self):
+        """Load the WavLM feature extractor and x-vector model onto the best available device"""
+        print("Initializing WavLM speaker diarization...")
+        self.root.after(0, lambda: self.status_var.set("Loading WavLM models..."))
+        if torch.cuda.is_available():
+            device = "cuda"
+        elif torch.backends.mps.is_available():
+            device = "mps"
+        else:
+            device = "cpu"
+        feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
+        # Load weights straight into fp16 on CUDA (inference runs under fp16 autocast there anyway)
+        model = WavLMForXVector.from_pretrained(
+            'microsoft/wavlm-base-plus-sv',
+            dtype=torch.float16 if device == "cuda" else torch.float32
+        )
+        model.to(device).eval()
+        print(f"WavLM models loaded successfully ({device})")
+        return device, feature_extractor, model
+
+    def load_diarization_pipeline(self, hf_token):
+        """Load the pyannote diarization pipeline (gated model, needs a Hugging Face token)"""
+        print("Initializing pyannote speaker diarization pipeline...")
+        self.root.after(0, lambda: self.status_var.set("Loading speaker diarization model..."))
+        pipeline = Pipeline.from_pretrained(
+            DIARIZATION_MODEL,
+            token=hf_token
+        )
+        print("Diarization pipeline loaded successfully")
+        return pipeline
+
+    def decode_file(self, file_path):
+        """Decode a media file to 16kHz mono float32, or None if it can't be decoded up front"""
+        if self.stop_requested:
+            return None
+        try:
+            return decode_audio(str(file_path), sampling_rate=SAMPLE_RATE)
+        except Exception as e:
+            print(f"Could not pre-decode {file_path.name}: {e}")
+            return None
+
+    def transcribe_file(self, file_path, audio=None, defer_diarization=False):
+        """Transcribe one file and write its transcript; True on success, False on error, None if stopped
+
+        With defer_diarization, a transcript that still needs diarizing is returned as a callable that
+        finishes it, so the caller can run it while the next file transcribes.
+        """
         try:
             print(f"Starting transcription of: {file_path}")
-            output_file = Path(self.output_folder) / f"{file_path.stem}.txt"
+            output_file = self._output_dir / f"{file_path.stem}.txt"
             print(f"Output file will be: {output_file}")
 
-            segments, info = self.model.transcribe(
-                str(file_path),
+            transcribe_kwargs = dict(
                 language=None,
                 beam_size=5,
                 vad_filter=True,
                 vad_parameters=dict(min_silence_duration_ms=100),
                 word_timestamps=True
             )
+            # Use the pre-decoded audio when available, otherwise let faster-whisper decode the file
+            whisper_input = audio if audio is not None else str(file_path)
+            if self.batched_model:
+                segments, info = self.batched_model.transcribe(
+                    whisper_input, batch_size=WHISPER_BATCH_SIZE, **transcribe_kwargs
+                )
+            else:
+                segments, info = self.model.transcribe(whisper_input, **transcribe_kwargs)
 
             print(f"Transcription started. Language: {info.language}, Duration: {info.duration:.2f}s")
 
             # Reset progress tracking
-            with self.progress_lock:
-                self.current_progress = 0.0
-                self.processed_segments = 0
+            self.current_progress = 0.0
+            self.processed_segments = 0
+            self._progress_dirty = True
+
+            output_format = self._output_format
+            # Without diarization nothing needs the whole transcript, so segments are written as they arrive
+            stream_output = not (self.wavlm_model and self.wavlm_feature_extractor) and not self.diarization_pipeline
 
             # Process segments one by one with progress updates
             segments_list = []
             total_duration = info.duration
             last_end_time = 0.0
 
-            for segment in segments:
-                # Check if stop was requested
-                if self.stop_requested:
-                    print("Stopping transcription during segment processing")
-                    return  # Exit transcribe_file early
-
-                segments_list.append(segment)
-                last_end_time = segment.end
-
-                # Update progress based on time processed vs total duration
-                with self.progress_lock:
-                    self.processed_segments = len(segments_list)
+            # Streamed output goes to a temp file that only replaces the transcript once fully written;
+            # a stop raises out of the block so the temp file is discarded and any old transcript kept
+            with _atomic_open(output_file, buffering=1 << 20) if stream_output else nullcontext() as out:
+                if out:
+                    self.write_header(out, file_path, info)
+
+                for segment in segments:
+                    # Check if stop was requested
+                    if self.stop_requested:
+                        print("Stopping transcription during segment processing")
+                        raise _StopTranscription
+
+                    # Keep only what diarization needs, not the token ids and decoding stats; the
+                    # text is stripped once here so formatting never strips it again
+                    record = TranscriptSegment(
+                        segment.start, segment.end, segment.text.strip(), segment.words,
+                        getattr(segment, 'no_speech_prob', 0.0)
+                    )
+                    if out:
+                        out.write(self.format_segment(record, "", output_format))
+                    else:
+                        segments_list.append(record)
+                    last_end_time = segment.end
+
+                    # Update progress based on time processed vs total duration, publishing only
+                    # whole-percent steps so the Tk thread has nothing to redraw in between
+                    self.processed_segments += 1
                     if total_duration > 0:
-                        self.current_progress = min(95.0, (last_end_time / total_duration) * 100)
+                        progress = min(95.0, (last_end_time / total_duration) * 100)
+                        if progress - self.current_progress >= PROGRESS_MIN_STEP:
+                            self.current_progress = progress
+                            self._progress_dirty = True
+
+            if stream_output:
+                print(f"Successfully wrote {self.processed_segments} segments to: {output_file}")
+                return True
 
             # Set to 95% before writing file
-            with self.progress_lock:
-                self.current_progress = 95.0
+            self.current_progress = 95.0
+            self._progress_dirty = True
 
             print(f"Got {len(segments_list)} segments")
 
+            if defer_diarization:
+                # The next file's transcription owns the progress bar by the time this runs
+                return partial(self.diarize_and_write, file_path, info, segments_list, audio, output_file,
+                               report_progress=False)
+        except _StopTranscription:
+            return None  # Exit transcribe_file early
+        except Exception as e:
+            self.report_file_error(file_path, e)
+            return False
+
+        return self.diarize_and_write(file_path, info, segments_list, audio, output_file)
+
+    def diarize_and_write(self, file_path, info, segments_list, audio, output_file, report_progress=True):
+        """Label speakers in a finished transcript (when a diarization model is loaded) and write it"""
+        def set_progress(value):
+            if report_progress:
+                self.current_progress = value
+                self._progress_dirty = True
+
+        output_format = self._output_format
+        try:
+            if self.stop_requested:
+                print(f"Stopped before diarizing {file_path.name}")
+                return None
+
             # Perform speaker diarization if enabled
-            speaker_labels = {}  # Maps segment index to speaker label
+            # Diarization replaces segments_list with SegmentWithSpeaker runs that carry their own label
+            diarized = False
 
             # Try WavLM diarization first (doesn't require HF token)
             if self.wavlm_model and self.wavlm_feature_extractor:
                 try:
                     print("Running WavLM speaker diarization...")
-                    with self.progress_lock:
-                        self.current_progress = 96.0
+                    set_progress(96.0)
 
-                    # Collect all words from segments
+                    # Collect all words from segments, noting which come from segments Whisper thinks are speech
                     all_words = []
+                    speech_word_indices = set()
+                    add_words, add_speech = all_words.extend, speech_word_indices.update
                     for segment in segments_list:
-                        if hasattr(segment, 'words') and segment.words:
-                            all_words.extend(segment.words)
+                        words = segment.words
+                        if words:
+                            if segment.no_speech_prob < NO_SPEECH_THRESHOLD:
+                                add_speech(range(len(all_words), len(all_words) + len(words)))
+                            add_words(words)
 
                     if len(all_words) > 0:
-                        print(f"Extracting embeddings for {len(all_words)} words...")
-
-                        # Load audio
-                        import torchaudio
-                        waveform, sample_rate = torchaudio.load(str(file_path))
-
-                        # Resample if needed
-                        if sample_rate != 16000:
-                            print(f"Resampling from {sample_rate}Hz to 16000Hz...")
-                            resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                            waveform = resampler(waveform)
-                            sample_rate = 16000
-
-                        # Use a sliding window approach to detect speaker changes
-                        # Window size: 1.0 second, Stride: 0.5 seconds
-                        WINDOW_SIZE = 1.0
-                        WINDOW_STRIDE = 0.5
-
-                        segments_for_embedding = []
-                        total_duration = all_words[-1].end if all_words else 0
-
-                        # Create overlapping windows
-                        current_time = 0
-                        while current_time < total_duration:
-                            window_start = current_time
-                            window_end = min(current_time + WINDOW_SIZE, total_duration)
-
-                            # Find words in this window
-                            window_word_indices = []
-                            for i, word in enumerate(all_words):
-                                word_center = (word.start + word.end) / 2
-                                if window_start <= word_center < window_end:
-                                    window_word_indices.append(i)
-
-                            if window_word_indices:
-                                segments_for_embedding.append({
-                                    'word_indices': window_word_indices,
-                                    'start': window_start,
-                                    'end': window_end
-                                })
-
-                            current_time += WINDOW_STRIDE
-
-                        print(f"Created {len(segments_for_embedding)} sliding windows for embedding extraction")
-
-                        # Extract embeddings for each segment
-                        valid_embeddings = []
-                        valid_segments = []
-
-                        for seg_info in segments_for_embedding:
-                            try:
-                                start_sample = int(seg_info['start'] * sample_rate)
-                                end_sample = int(seg_info['end'] * sample_rate)
-                                segment_audio = waveform[:, start_sample:end_sample]
-
-                                # Extract embedding
-                                inputs = self.wavlm_feature_extractor(
-                                    segment_audio.squeeze().numpy(),
-                                    sampling_rate=16000,
-                                    return_tensors="pt",
-                                    padding=True
-                                )
-                                with torch.no_grad():
-                                    embedding = self.wavlm_model(**inputs).embeddings
-                                    embedding = torch.nn.functional.normalize(embedding, dim=-1)
-
-                                # Check for NaN values after normalization
-                                embedding_np = embedding[0].cpu().numpy()
-                                if not np.isnan(embedding_np).any():
-                                    valid_embeddings.append(embedding_np)
-                                    valid_segments.append(seg_info)
-                            except Exception as e:
-                                # Skip segments that fail embedding extraction
-                                continue
-
-                        print(f"Extracted {len(valid_embeddings)} valid segment embeddings")
-
-                        # Only cluster if we have enough valid embeddings
-                        if len(valid_embeddings) < 2:
-                            print("Not enough valid embeddings for clustering, assigning all to SPEAKER_00")
+                        if self._num_speakers == 1 or all_words[-1].end - all_words[0].start < MIN_DIARIZATION_SECONDS:
+                            # Nothing to tell apart, so skip audio loading, WavLM inference and clustering
+                            print("Single speaker requested or too little speech, assigning all to SPEAKER_00")
                             for word in all_words:
                                 word.speaker = "SPEAKER_00"
                         else:
-                            # Cluster segment embeddings
-                            embeddings_array = np.array(valid_embeddings)
-                            num_speakers = self._num_speakers if self._num_speakers > 0 else 2
-                            num_speakers = min(num_speakers, len(valid_embeddings))  # Can't have more clusters than samples
-                            print(f"Clustering {len(embeddings_array)} segment embeddings into {num_speakers} speakers...")
-
-                            clustering = AgglomerativeClustering(
-                                n_clusters=num_speakers,
-                                metric='cosine',
-                                linkage='average'
-                            )
-                            speaker_ids = clustering.fit_predict(embeddings_array)
-
-                            unique_speakers = len(set(speaker_ids))
-                            print(f"WavLM detected {unique_speakers} distinct speakers")
-
-                            # Assign speaker labels to segments
-                            for i, seg_info in enumerate(valid_segments):
-                                seg_info['speaker'] = f"SPEAKER_{speaker_ids[i]:02d}"
-
-                            # Assign speakers to words using voting from overlapping windows
-                            from collections import Counter
-
-                            for word_idx, word in enumerate(all_words):
-                                # Find all windows that contain this word
-                                speaker_votes = []
-                                for seg_info in valid_segments:
-                                    if word_idx in seg_info['word_indices']:
-                                        speaker_votes.append(seg_info['speaker'])
-
-                                if speaker_votes:
-                                    # Use majority vote
-                                    speaker_counts = Counter(speaker_votes)
-                                    word.speaker = speaker_counts.most_common(1)[0][0]
-                                else:
-                                    # Fallback: assign to nearest window by time
-                                    if not valid_segments:
-                                        word.speaker = "SPEAKER_00"
-                                    else:
-                                        word_time = (word.start + word.end) / 2
-                                        nearest_seg = min(valid_segments,
-                                                        key=lambda s: abs((s['start'] + s['end'])/2 - word_time))
-                                        word.speaker = nearest_seg['speaker']
-
-                        # Define SegmentWithSpeaker class
-                        class SegmentWithSpeaker:
-                            def __init__(self, text, start, end, speaker):
-                                self.text = text
-                                self.start = start
-                                self.end = end
-                                self.speaker = speaker
+                            print(f"Extracting embeddings for {len(all_words)} words...")
 
-                        # Re-segment based on speaker changes
-                        new_segments = []
-                        current_speaker = None
-                        current_words = []
-                        current_start = all_words[0].start if all_words else 0
-
-                        for word in all_words:
-                            if word.speaker != current_speaker and current_words:
-                                # Create segment for accumulated words
-                                text = ' '.join([w.word.strip() for w in current_words])
-                                end_time = current_words[-1].end
-                                new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
-
-                                # Start new segment
-                                current_words = [word]
-                                current_start = word.start
-                                current_speaker = word.speaker
+                            # Load audio (reuse the pre-decoded 16kHz mono samples when we have them)
+                            if audio is not None:
+                                waveform, sample_rate = torch.from_numpy(audio).unsqueeze(0), SAMPLE_RATE
+                            else:
+                                waveform, sample_rate = torchaudio.load(str(file_path))
+
+                            # Windows never extend past the last word, so drop the tail before resampling/mixing
+                            waveform = waveform[:, :int(all_words[-1].end * sample_rate) + 1]
+                            # Mix to mono before resampling so the filter runs over a single channel
+                            if waveform.shape[0] > 1:
+                                waveform = waveform.mean(dim=0, keepdim=True)
+
+                            # Resample if needed
+                            if sample_rate != 16000:
+                                print(f"Resampling from {sample_rate}Hz to 16000Hz...")
+                                waveform = self.resample_to_16k(waveform, sample_rate)
+                                sample_rate = 16000
+
+                            # Use a sliding window approach to detect speaker changes
+                            # Window size: 1.0 second, Stride: 0.5 seconds
+                            WINDOW_SIZE = 1.0
+                            WINDOW_STRIDE = 0.5
+
+                            segments_for_embedding = []
+                            total_duration = all_words[-1].end if all_words else 0
+
+                            # Word centers are computed once and reused for window membership and voting.
+                            # Words are chronological but centers need not be, so search a sorted copy
+                            word_centers = np.fromiter(((w.start + w.end) / 2 for w in all_words),
+                                                       dtype=np.float64, count=len(all_words))
+                            center_order = np.argsort(word_centers, kind='stable')
+                            sorted_centers = word_centers[center_order]
+
+                            # Create overlapping windows, locating every window's words in one
+                            # searchsorted call (window_start <= center < window_end)
+                            window_starts = np.arange(0.0, total_duration, WINDOW_STRIDE)
+                            window_ends = np.minimum(window_starts + WINDOW_SIZE, total_duration)
+                            window_los = np.searchsorted(sorted_centers, window_starts)
+                            window_his = np.searchsorted(sorted_centers, window_ends)
+
+                            # Windows holding only likely-silence words are not worth embedding; their
+                            # words pick up the nearest window's speaker below
+                            is_speech = np.zeros(len(all_words), dtype=bool)
+                            is_speech[list(speech_word_indices)] = True
+                            sorted_is_speech = is_speech[center_order]
+                            speech_before = np.concatenate(([0], np.cumsum(sorted_is_speech)))
+                            has_speech = speech_before[window_his] > speech_before[window_los]
+
+                            for window in np.flatnonzero(has_speech).tolist():
+                                lo, hi = window_los[window], window_his[window]
+                                segments_for_embedding.append({
+                                    'word_indices': np.sort(center_order[lo:hi]).tolist(),
+                                    'start': float(window_starts[window]),
+                                    'end': float(window_ends[window])
+                                })
+
+                            print(f"Created {len(segments_for_embedding)} sliding windows for embedding extraction")
+
+                            # Extract embeddings for all windows in batched forward passes
+                            valid_embeddings, valid_segments = self.extract_embeddings_batched(waveform, segments_for_embedding)
+
+                            print(f"Extracted {len(valid_embeddings)} valid segment embeddings")
+
+                            # Only cluster if we have enough valid embeddings
+                            if len(valid_embeddings) < 2:
+                                print("Not enough valid embeddings for clustering, assigning all to SPEAKER_00")
+                                for word in all_words:
+                                    word.speaker = "SPEAKER_00"
                             else:
-                                # Same speaker, accumulate word
-                                if not current_words:
-                                    current_speaker = word.speaker
-                                current_words.append(word)
+                                # Cluster segment embeddings
+                                embeddings_array = np.array(valid_embeddings)
+                                num_speakers = self._num_speakers if self._num_speakers > 0 else 2
+                                num_speakers = min(num_speakers, len(valid_embeddings))  # Can't have more clusters than samples
+                                print(f"Clustering {len(embeddings_array)} segment embeddings into {num_speakers} speakers...")
+
+                                speaker_ids = self.cluster_embeddings(embeddings_array, num_speakers)
+
+                                unique_speakers = len(set(speaker_ids))
+                                print(f"WavLM detected {unique_speakers} distinct speakers")
 
-                        # Add final segment
-                        if current_words:
-                            text = ' '.join([w.word.strip() for w in current_words])
-                            end_time = current_words[-1].end
-                            new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
+                                # Assign speakers to words using voting from overlapping windows
+                                word_speaker_ids = self.vote_word_speakers(word_centers, valid_segments, speaker_ids)
+                                for word, speaker_id in zip(all_words, word_speaker_ids):
+                                    word.speaker = f"SPEAKER_{speaker_id:02d}"
+
+                        # Re-segment based on speaker changes
+                        new_segments = _speaker_runs(all_words, (word.speaker for word in all_words))
 
                         # Replace segments_list with WavLM re-segmented version
                         segments_list = new_segments
-                        speaker_labels = {idx: seg.speaker for idx, seg in enumerate(segments_list) if seg.speaker}
+                        diarized = True
 
                         print(f"WavLM re-segmented into {len(segments_list)} speaker turns")
 
-                        with self.progress_lock:
-                            self.current_progress = 98.0
+                        set_progress(98.0)
 
                 except Exception as e:
                     print(f"WavLM diarization failed: {e}")
-                    import traceback
                     traceback.print_exc()
-                    speaker_labels = {}
 
             # Fall back to pyannote if WavLM didn't run or failed
-            if not speaker_labels and self.diarization_pipeline:
+            if not diarized and self.diarization_pipeline and not self.stop_requested:
                 try:
                     print("Running speaker diarization...")
-                    with self.progress_lock:
-                        self.current_progress = 96.0
-
-                    # Convert audio to WAV for diarization (pyannote works better with WAV)
-                    import tempfile
-                    import torchaudio
-
-                    # Load audio and convert to WAV
-                    waveform, sample_rate = torchaudio.load(str(file_path))
-
-                    # Create temp WAV file
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_wav:
-                        tmp_wav_path = tmp_wav.name
-                        torchaudio.save(tmp_wav_path, waveform, sample_rate)
-
-                    try:
-                        # Run diarization on WAV file
-                        num_speakers = self._num_speakers if self._num_speakers > 0 else None
-                        diarization = self.diarization_pipeline(
-                            tmp_wav_path,
-                            num_speakers=num_speakers
-                        )
-
-                        print(f"Diarization complete. Re-segmenting based on speaker changes...")
-
-                        # Show what diarization detected
-                        print("\nDiarization detected speaker timeline:")
-                        speaker_turns = list(diarization.speaker_diarization.itertracks(yield_label=True))
+                    set_progress(96.0)
+
+                    # Hand pyannote the samples already decoded for Whisper instead of a re-encoded temp WAV
+                    if audio is None:
+                        audio = decode_audio(str(file_path), sampling_rate=SAMPLE_RATE)
+
+                    num_speakers = self._num_speakers if self._num_speakers > 0 else None
+                    cache_file = self.diarization_cache_file(file_path, num_speakers)
+                    speaker_turns = self.load_cached_turns(cache_file) if cache_file else None
+                    if speaker_turns is not None:
+                        print("Using cached diarization for this audio")
+                    else:
+                        speaker_turns = self.run_pyannote(audio, num_speakers)
+                        if cache_file:
+                            self.save_cached_turns(cache_file, speaker_turns)
+
+                    print(f"Diarization complete. Re-segmenting based on speaker changes...")
+
+                    # Summarize what diarization detected; the full timeline is only logged with TA_DEBUG
+                    print(f"Diarization detected {len(speaker_turns)} speaker turns")
+                    if log.isEnabledFor(logging.DEBUG):
                         for turn, _, spk in speaker_turns:
-                            print(f"  {spk}: {turn.start:.2f}s - {turn.end:.2f}s")
-
-                        if len(speaker_turns) == 0:
-                            print("WARNING: No speakers detected by diarization model!")
-                        elif len(set(spk for _, _, spk in speaker_turns)) == 1:
-                            print("WARNING: Only 1 speaker detected - diarization may have failed")
-
-                        # Define SegmentWithSpeaker class
-                        class SegmentWithSpeaker:
-                            def __init__(self, text, start, end, speaker):
-                                self.text = text
-                                self.start = start
-                                self.end = end
-                                self.speaker = speaker
-
-                        # Re-segment using word-level timestamps matched to diarization
-                        new_segments = []
-
-                        for segment in segments_list:
-                            if not hasattr(segment, 'words') or not segment.words:
-                                # No word timestamps, match whole segment to speaker
-                                seg_mid = (segment.start + segment.end) / 2
-                                speaker = None
-                                for turn, _, spk in speaker_turns:
-                                    if turn.start <= seg_mid <= turn.end:
-                                        speaker = str(spk)
-                                        break
-                                new_segments.append(SegmentWithSpeaker(segment.text, segment.start, segment.end, speaker))
-                            else:
-                                # Has word timestamps - split on speaker changes
-                                current_speaker = None
-                                current_words = []
-                                current_start = segment.words[0].start
-
-                                for word in segment.words:
-                                    word_mid = (word.start + word.end) / 2
-                                    word_speaker = None
-
-                                    # Find speaker for this word
-                                    for turn, _, spk in speaker_turns:
-                                        if turn.start <= word_mid <= turn.end:
-                                            word_speaker = str(spk)
-                                            break
-
-                                    # Check if speaker changed
-                                    if word_speaker != current_speaker and current_words:
-                                        # Create segment for accumulated words
-                                        text = ' '.join([w.word.strip() for w in current_words])
-                                        end_time = current_words[-1].end
-                                        new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
-
-                                        # Start new segment
-                                        current_words = [word]
-                                        current_start = word.start
-                                        current_speaker = word_speaker
-                                    else:
-                                        # Same speaker, accumulate word
-                                        if not current_words:
-                                            current_speaker = word_speaker
-                                        current_words.append(word)
-
-                                # Add final segment
-                                if current_words:
-                                    text = ' '.join([w.word.strip() for w in current_words])
-                                    end_time = current_words[-1].end
-                                    new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
-
-                        # Replace segments_list with re-segmented version
-                        segments_list = new_segments
-                        # Update speaker_labels to use segment index
-                        speaker_labels = {idx: seg.speaker for idx, seg in enumerate(segments_list) if seg.speaker}
+                            log.debug("  %s: %.2fs - %.2fs", spk, turn.start, turn.end)
+
+                    if len(speaker_turns) == 0:
+                        print("WARNING: No speakers detected by diarization model!")
+                    elif len(set(spk for _, _, spk in speaker_turns)) == 1:
+                        print("WARNING: Only 1 speaker detected - diarization may have failed")
+
+                    # Re-segment using word-level timestamps matched to diarization. Every word (or whole
+                    # segment, without word timestamps) is labelled and grouped in one pass; runs also
+                    # break where each Whisper segment starts
+                    units, tokens, segment_starts = [], [], []
+                    # Bound methods hoisted out of the per-segment loop
+                    add_start, add_unit, add_units = segment_starts.append, units.append, units.extend
+                    add_token, add_tokens = tokens.append, tokens.extend
+                    for segment in segments_list:
+                        add_start(len(units))
+                        words = segment.words
+                        if words:
+                            add_units(words)
+                            add_tokens([word.word for word in words])
+                        else:
+                            add_unit(segment)
+                            add_token(segment.text)
+
+                    midpoints = [(unit.start + unit.end) / 2 for unit in units]
+                    new_segments = _speaker_runs(units, self.speakers_at(speaker_turns, midpoints),
+                                                 tokens=tokens, breaks=segment_starts[1:])
 
-                        print(f"\nRe-segmented into {len(segments_list)} speaker turns based on diarization output")
+                    # Replace segments_list with re-segmented version
+                    segments_list = new_segments
+                    diarized = True
 
-                        with self.progress_lock:
-                            self.current_progress = 98.0
+                    print(f"\nRe-segmented into {len(segments_list)} speaker turns based on diarization output")
 
-                    finally:
-                        # Clean up temp WAV file
-                        import os
-                        try:
-                            os.unlink(tmp_wav_path)
-                        except:
-                            pass
+                    set_progress(98.0)
 
                 except Exception as e:
                     print(f"Diarization failed: {e}")
-                    speaker_labels = {}
 
-            # Write output based on selected format
-            output_format = self._output_format
+            if self.stop_requested:
+                print(f"Stopped before writing {file_path.name}")
+                return None
 
-            with open(output_file, 'w', encoding='utf-8') as f:
-                # Header (always included)
-                f.write(f"Transcript: {file_path.name}\n")
-                f.write(f"Language: {info.language}\n")
-                f.write(f"Duration: {info.duration:.2f} seconds\n")
-                f.write(f"{'-'*80}\n\n")
-
-                if output_format == "with_timestamps":
-                    # Format with timestamps (for subtitles)
-                    for idx, segment in enumerate(segments_list):
-                        timestamp = f"[{self.format_timestamp(segment.start)} --> {self.format_timestamp(segment.end)}]"
-                        speaker = speaker_labels.get(idx, "")
-                        speaker_label = f"{speaker}: " if speaker else ""
-                        f.write(f"{timestamp}\n{speaker_label}{segment.text.strip()}\n\n")
-                else:
-                    # Plain text format (conversational with speakers)
-                    for idx, segment in enumerate(segments_list):
-                        speaker = speaker_labels.get(idx, "")
-                        speaker_label = f"{speaker}: " if speaker else ""
-                        f.write(f"{speaker_label}{segment.text.strip()}\n\n")
+            # Write output based on selected format, built in one join and written once
+            if diarized:
+                # "SPEAKER_00: " prefixes are built once per distinct speaker rather than per segment
+                prefixes = {speaker: f"{speaker}: " if speaker else "" for speaker in {seg.speaker for seg in segments_list}}
+                labels = [prefixes[segment.speaker] for segment in segments_list]
+            else:
+                labels = repeat("")
+            with _atomic_open(output_file) as f:
+                self.write_header(f, file_path, info)
+                f.write("".join(
+                    self.format_segment(segment, label, output_format)
+                    for segment, label in zip(segments_list, labels)
+                ))
 
             print(f"Successfully wrote transcript to: {output_file}")
             return True
 
         except Exception as e:
-            error_msg = f"Error transcribing {file_path.name}: {e}"
-            print(error_msg)
-            import traceback
-            traceback.print_exc()
-            self.root.after(0, lambda: self.status_var.set(error_msg))
+            self.report_file_error(file_path, e)
             return False
 
-    def format_timestamp(self, seconds):
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    def report_file_error(self, file_path, error):
+        """Log a per-file failure and show it in the status bar"""
+        error_msg = f"Error transcribing {file_path.name}: {error}"
+        print(error_msg)
+        traceback.print_exc()
+        self._ui_post(lambda: self.status_var.set(error_msg))
+
+    def resample_to_16k(self, waveform, sample_rate):
+        """Resample to 16kHz, reusing one Resample module (and its filter kernel) per source rate"""
+        resampler = self._resamplers.get(sample_rate)
+        if resampler is None:
+            resampler = self._resamplers[sample_rate] = torchaudio.transforms.Resample(sample_rate, SAMPLE_RATE)
+        return resampler(waveform)
+
+    def cluster_embeddings(self, embeddings, num_speakers):
+        """Average-linkage cosine clustering of L2-normalized embeddings into 0-based speaker ids"""
+        # Embeddings are unit length, so one GEMM gives all pairwise cosine similarities
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        distances = np.clip(1.0 - embeddings @ embeddings.T, 0.0, 2.0)
+        np.fill_diagonal(distances, 0.0)
+        tree = linkage(squareform(distances, checks=False), method='average')
+        return fcluster(tree, t=num_speakers, criterion='maxclust') - 1
+
+    def _to_wavlm_device(self, name, tensor):
+        """Move a WavLM input to its device, staging CUDA copies through a reused pinned buffer"""
+        if self.wavlm_device != "cuda":
+            return tensor.to(self.wavlm_device)
+
+        buffer = self._pinned_buffers.get(name)
+        if buffer is None or buffer.dtype != tensor.dtype or buffer.numel() < tensor.numel():
+            size = max(tensor.numel(), WAVLM_BATCH_SIZE * SAMPLE_RATE)
+            buffer = self._pinned_buffers[name] = torch.empty(size, dtype=tensor.dtype, pin_memory=True)
+
+        # Safe to reuse next batch: the forward pass and .cpu() that follow wait for this copy
+        staged = buffer[:tensor.numel()].view(tensor.shape)
+        staged.copy_(tensor)
+        return staged.to(self.wavlm_device, non_blocking=True)
+
+    def vote_word_speakers(self, word_centers, windows, window_speaker_ids):
+        """Majority-vote a speaker id for each word from the windows that contain it
+
+        Ties go to the speaker of the earliest such window; words outside every window take the
+        speaker of the window whose center is nearest.
+        """
+        window_speaker_ids = np.asarray(window_speaker_ids)
+        num_words, num_windows = len(word_centers), len(windows)
+        num_speakers = int(window_speaker_ids.max()) + 1
+
+        # Flatten window membership into parallel (window, word) index arrays
+        counts = np.fromiter((len(w['word_indices']) for w in windows), dtype=np.intp, count=num_windows)
+        window_idx = np.repeat(np.arange(num_windows), counts)
+        word_idx = np.fromiter(chain.from_iterable(w['word_indices'] for w in windows),
+                               dtype=np.intp, count=int(counts.sum()))
+        vote_speakers = window_speaker_ids[window_idx]
+
+        votes = np.bincount(word_idx * num_speakers + vote_speakers,
+                            minlength=num_words * num_speakers).reshape(num_words, num_speakers)
+        first_window = np.full((num_words, num_speakers), num_windows, dtype=np.intp)
+        np.minimum.at(first_window, (word_idx, vote_speakers), window_idx)
+
+        # Among the top-voted speakers, prefer the one seen in the earliest window
+        top = votes == votes.max(axis=1, keepdims=True)
+        labels = np.where(top, first_window, num_windows).argmin(axis=1)
+
+        unvoted = votes.sum(axis=1) == 0
+        if unvoted.any():
+            window_centers = np.fromiter(((w['start'] + w['end']) / 2 for w in windows),
+                                         dtype=np.float64, count=num_windows)
+            nearest = np.abs(word_centers[unvoted, None] - window_centers[None, :]).argmin(axis=1)
+            labels[unvoted] = window_speaker_ids[nearest]
+        return labels
+
+    def run_pyannote(self, audio, num_speakers):
+        """Speaker turns from pyannote, diarizing audio longer than DIARIZATION_CHUNK_SECONDS in pieces"""
+        if len(audio) > DIARIZATION_CHUNK_SECONDS * SAMPLE_RATE:
+            speaker_turns = self.run_pyannote_chunked(audio, num_speakers)
+            if speaker_turns is not None:
+                return speaker_turns
+
+        diarization = self.diarization_pipeline(
+            {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": SAMPLE_RATE},
+            num_speakers=num_speakers
+        )
+        return list(diarization.speaker_diarization.itertracks(yield_label=True))
+
+    def run_pyannote_chunked(self, audio, num_speakers):
+        """Diarize in DIARIZATION_CHUNK_SECONDS pieces so pyannote's memory stays bounded on long audio
+
+        Labels stay consistent across pieces by matching each piece's speaker embeddings to running
+        per-speaker centroids. Returns None if the pipeline doesn't report speaker embeddings.
+        """
+        chunk_samples = DIARIZATION_CHUNK_SECONDS * SAMPLE_RATE
+        speaker_turns, centroids, weights = [], [], []
+        for offset in range(0, len(audio), chunk_samples):
+            # A piece can hold fewer speakers than the whole file, so the requested count is only a cap
+            diarization = self.diarization_pipeline(
+                {"waveform": torch.from_numpy(audio[offset:offset + chunk_samples]).unsqueeze(0),
+                 "sample_rate": SAMPLE_RATE},
+                max_speakers=num_speakers
+            )
+            embeddings = getattr(diarization, 'speaker_embeddings', None)
+            if embeddings is None:
+                print("Diarization pipeline returned no speaker embeddings, diarizing the whole file at once")
+                return None
+
+            tracks = list(diarization.speaker_diarization.itertracks(yield_label=True))
+            labels = diarization.speaker_diarization.labels()
+            durations = dict.fromkeys(labels, 0.0)
+            for turn, _, label in tracks:
+                durations[label] += turn.end - turn.start
+            ids = _match_speakers(embeddings, [durations[label] for label in labels], centroids, weights,
+                                  max_speakers=num_speakers)
+            names = {label: f"SPEAKER_{speaker_id:02d}" for label, speaker_id in zip(labels, ids)}
+
+            start = offset / SAMPLE_RATE
+            speaker_turns.extend(
+                (TurnSpan(turn.start + start, turn.end + start), None, names[label]) for turn, _, label in tracks
+            )
+        return speaker_turns
+
+    def diarization_cache_file(self, file_path, num_speakers):
+        """Cache file for pyannote turns, keyed by the source file's path, size and mtime plus the
+        speaker count, model and chunking; None if the source can't be stat'ed"""
+        try:
+            path = Path(file_path).resolve()
+            stat = path.stat()
+        except OSError:
+            return None
+        key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{num_speakers}|{DIARIZATION_MODEL}|{DIARIZATION_CHUNK_SECONDS}"
+        return DIARIZATION_CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def load_cached_turns(self, cache_file):
+        """Speaker turns saved for this audio, or None if there are none (or they can't be read)"""
+        try:
+            data = _json_loads(cache_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable diarization cache {cache_file.name}: {e}")
+            return None
+        try:
+            cache_file.touch()  # mark as recently used so pruning keeps it
+        except OSError:
+            pass
+        return [(TurnSpan(start, end), None, speaker) for start, end, speaker in data]
+
+    def save_cached_turns(self, cache_file, speaker_turns):
+        """Save speaker turns as [start, end, speaker] rows; a failed write only costs a re-run"""
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix('.tmp')
+            tmp_file.write_bytes(_json_dumps([[turn.start, turn.end, str(spk)] for turn, _, spk in speaker_turns]))
+            tmp_file.replace(cache_file)
+        except Exception as e:
+            print(f"Could not save diarization cache: {e}")
+            return
+        self.prune_diarization_cache()
+
+    def prune_diarization_cache(self):
+        """Delete the least recently used cache entries beyond DIARIZATION_CACHE_MAX_FILES"""
+        try:
+            entries = sorted(
+                ((f.stat().st_mtime_ns, f) for f in DIARIZATION_CACHE_DIR.glob('*.json')),
+                reverse=True,
+            )
+            for _, stale in entries[DIARIZATION_CACHE_MAX_FILES:]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Could not prune diarization cache: {e}")
+
+    def speakers_at(self, speaker_turns, times):
+        """Label each time with the speaker of the diarization turn covering it, or None
+
+        Turns are located by binary search on their start times. Where a short turn nested inside
+        a longer overlapping one hides it, the longer turn is found by scanning back.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if not speaker_turns:
+            return [None] * len(times)
+
+        turn_starts = np.fromiter((turn.start for turn, _, _ in speaker_turns),
+                                  dtype=np.float64, count=len(speaker_turns))
+        order = np.argsort(turn_starts, kind='stable')
+        turn_starts = turn_starts[order]
+        turn_ends = np.array([speaker_turns[i][0].end for i in order], dtype=np.float64)
+        turn_spks = np.array([str(speaker_turns[i][2]) for i in order], dtype=object)
+
+        idx = np.searchsorted(turn_starts, times, side='right') - 1
+        started = idx >= 0
+        idx = idx.clip(0)
+        hit = started & (times <= turn_ends[idx])
+        speakers = np.where(hit, turn_spks[idx], None)
+
+        covered = started & (times <= np.maximum.accumulate(turn_ends)[idx])
+        for i in np.flatnonzero(covered & ~hit):
+            j = idx[i]
+            while times[i] > turn_ends[j]:
+                j -= 1
+            speakers[i] = turn_spks[j]
+        return speakers.tolist()
+
+    def extract_embeddings_batched(self, waveform, segments):
+        """Extract normalized WavLM embeddings for sliding windows in batched forward passes
+
+        Returns (embeddings, valid_segments); windows that fail or yield NaN embeddings are dropped.
+        """
+        device = self.wavlm_device
+
+        # Slice every window up front (mixed down to mono) so batches can be built without touching the waveform again.
+        # Single-channel audio is viewed as-is rather than copied through mean()
+        mono = waveform[0] if waveform.shape[0] == 1 else waveform.mean(dim=0)
+        audios = [mono[int(seg['start'] * SAMPLE_RATE):int(seg['end'] * SAMPLE_RATE)].numpy() for seg in segments]
+
+        # Skip near-silent windows before they reach WavLM
+        # (a dot product per window view avoids allocating a squared copy of each window)
+        voiced = [i for i, audio in enumerate(audios) if audio.size and np.dot(audio, audio) >= SILENCE_RMS ** 2 * audio.size]
+        if len(voiced) < len(audios):
+            print(f"Skipping {len(audios) - len(voiced)} silent windows")
+            audios = [audios[i] for i in voiced]
+            segments = [segments[i] for i in voiced]
+
+        embeddings_list = []
+        valid_segments = []
+        for batch_start in range(0, len(segments), WAVLM_BATCH_SIZE):
+            batch_audios = audios[batch_start:batch_start + WAVLM_BATCH_SIZE]
+            batch_segments = segments[batch_start:batch_start + WAVLM_BATCH_SIZE]
+            try:
+                inputs = self.wavlm_feature_extractor(
+                    batch_audios,
+                    sampling_rate=SAMPLE_RATE,
+                    return_tensors="pt",
+                    padding=True
+                )
+                inputs = {k: self._to_wavlm_device(k, v) for k, v in inputs.items()}
+                with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=torch.float16, enabled=(device == "cuda")):
+                    embeddings = self.wavlm_model(**inputs).embeddings
+                # Normalize and cluster in fp32
+                embeddings = torch.nn.functional.normalize(embeddings.float(), dim=-1).cpu().numpy()
+            except Exception as e:
+                print(f"Skipping embedding batch at {batch_segments[0]['start']:.2f}s: {e}")
+                continue
+
+            # Drop windows whose embedding came out as NaN (e.g. too short to pool)
+            finite = ~np.isnan(embeddings).any(axis=1)
+            embeddings_list.append(embeddings[finite])
+            valid_segments.extend(seg for seg, ok in zip(batch_segments, finite) if ok)
+
+        if not embeddings_list:
+            return np.empty((0, 512), dtype=np.float32), []
+        return np.concatenate(embeddings_list), valid_segments
+
+    def write_header(self, f, file_path, info):
+        """Write the transcript header (always included)"""
+        f.write(f"Transcript: {file_path.name}\n"
+                f"Language: {info.language}\n"
+                f"Duration: {info.duration:.2f} seconds\n"
+                f"{'-'*80}\n\n")
+
+    def format_segment(self, segment, speaker_label, output_format):
+        """Render one segment (text already stripped): timestamped (for subtitles) or plain conversational text"""
+        if output_format == "with_timestamps":
+            # One f-string (a single BUILD_STRING) and the cached formatter called directly
+            return f"[{_hms(int(segment.start))} --> {_hms(int(segment.end))}]\n{speaker_label}{segment.text}\n\n"
+        return f"{speaker_label}{segment.text}\n\n"
+
+    def _ui_post(self, fn):
+        """Queue a UI update from the worker thread; poll_progress applies it on the Tk thread"""
+        self._ui_queue.put(fn)
 
     def poll_progress(self):
         """Poll progress from main thread and update UI"""
+        # Apply UI updates the worker queued since the last tick
+        while True:
+            try:
+                fn = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            fn()
+
         if self.is_processing:
-            with self.progress_lock:
+            # Only redraw when the worker reported something new since the last poll
+            if self._progress_dirty:
+                self._progress_dirty = False
                 progress_value = self.current_progress
                 segments_info = f" ({self.processed_segments} segments)" if self.processed_segments > 0 else ""
 
-            # Update progress bar
-            self.progress['value'] = progress_value
-
-            # Update status with percentage
-            if progress_value > 0:
-                self.status_var.set(f"Transcribing... {progress_value:.0f}%{segments_info}")
+                # Update progress bar and the current file's row
+                self.progress['value'] = progress_value
+                if self.current_file is not None:
+                    self.set_file_status(self.current_file, "Transcribing", progress_value)
 
-            # Force UI update
-            self.progress.update_idletasks()
+                # Update status with percentage
+                if progress_value > 0:
+                    self.status_var.set(f"Transcribing... {progress_value:.0f}%{segments_info}")
 
             # Schedule next poll
-            self.root.after(500, self.poll_progress)
+            self.root.after(PROGRESS_POLL_MS, self.poll_progress)
 
     def transcription_complete(self):
+        self.current_file = None
         self.progress.stop()
         self.progress.config(mode='determinate')
 
@@ -1453,7 +2182,7 @@ class TranscriptionApp:
         else:
             self.progress['value'] = 100
             self.status_var.set(f"Complete — Transcribed {len(self.file_queue)} file(s)")
-            self.file_queue = []
+            self.file_queue.clear()
 
         self.update_file_list()
         self.is_processing = False
@@ -1471,6 +2200,26 @@ class TranscriptionApp:
         # Progress bar will reset when next transcription starts
         # No delayed reset needed - prevents jumping when starting consecutive transcriptions
 
+        # Give the model memory back if the app sits idle
+        self._release_after_id = self.root.after(MODEL_IDLE_RELEASE_MS, self.release_models)
+
+    def release_models(self):
+        """Drop loaded models so an idle app doesn't keep their weights resident"""
+        self._release_after_id = None
+        if self.is_processing:
+            return
+
+        self.model = None
+        self.batched_model = None
+        self.wavlm_model = None
+        self.wavlm_feature_extractor = None
+        self.diarization_pipeline = None
+        self._model_cache = {}
+        self._pinned_buffers = {}
+        gc.collect()
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print("Released idle transcription models")
 
 def main():
     # Try to use drag-and-drop, fall back to regular Tk if it fails
@@ -1486,6 +2235,15 @@ def main():
         root = Tk()
 
     app = TranscriptionApp(root, dnd_enabled=dnd_enabled)
+
+    # Flush a pending debounced config write before the window closes
+    def on_close():
+        # Worker, decode and diarization threads are daemons; the flag just stops them starting new work
+        app.stop_requested = True
+        app.flush_config()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 
 